@@ -0,0 +1,206 @@
+import os
+import re
+import sqlite3
+import argparse
+
+from run_metadata import parse_run_dir
+
+# SQLite index of a capture (or results) tree: one row per run directory with
+# the metadata from its name, one row per file with its NF, kind and size.
+# Built with a single walk; the analysis scripts query it (--catalog) instead
+# of walking the tree and regex-matching folder names themselves.
+
+CATALOG_NAME = "catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    parent TEXT NOT NULL,
+    source TEXT NOT NULL,
+    core TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    ue_count INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    mean_delay REAL,
+    timestamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER REFERENCES runs(id),
+    path TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    nf TEXT,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_run ON files(run_id);
+CREATE INDEX IF NOT EXISTS files_kind ON files(kind, ext);
+CREATE INDEX IF NOT EXISTS runs_group ON runs(core, operation, ue_count);
+"""
+
+# <ue_count|core>_<nf>[_capture].<ext>, as written by the capture scripts and kept by the parsers
+NF_FILE = re.compile(r"^(?:\d+|open5gs|free5gc|aether)_(?P<nf>[a-z0-9\-]+?)(?:_capture)?\.")
+
+CAPTURE_EXTS = {".pcap", ".pcapng"}
+CONVERTED_EXTS = {".json", ".pdml", ".tsv"}
+
+
+def classify(name):
+    """Return (ext, kind, nf) for a file name."""
+    ext = os.path.splitext(name)[1].lower()
+    if name.endswith("system.csv"):
+        kind = "system"
+    elif ext in CAPTURE_EXTS:
+        kind = "capture"
+    elif ext in CONVERTED_EXTS:
+        kind = "converted"
+    elif ext in {".csv", ".parquet"}:
+        kind = "table"
+    elif ext == ".log":
+        kind = "log"
+    else:
+        kind = "other"
+
+    if "ueransim" in name.lower():
+        nf = "ueransim"
+    elif kind == "system":
+        nf = None
+    else:
+        match = NF_FILE.match(name)
+        nf = match.group("nf") if match else None
+    return ext, kind, nf
+
+
+def build_catalog(root, db_path=None):
+    """Walk root once and (re)write its catalog. Returns the database path."""
+    root = os.path.abspath(root)
+    db_path = db_path or os.path.join(root, CATALOG_NAME)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.executescript(SCHEMA)
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM runs")
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('root', ?)", (root,))
+
+            run_ids = {}  # directory -> run id of that directory or its closest run ancestor
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                rel_dir = os.path.relpath(dirpath, root)
+                run = parse_run_dir(os.path.basename(dirpath))
+                if run:
+                    cursor = conn.execute(
+                        "INSERT INTO runs (path, name, parent, source, core, operation, ue_count, mode, mean_delay, timestamp)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (rel_dir, os.path.basename(dirpath), os.path.basename(os.path.dirname(dirpath)),
+                         run["source"], run["core"], run["operation"], run["ue_count"], run["mode"],
+                         run["mean_delay"], run["timestamp"]),
+                    )
+                    run_ids[dirpath] = cursor.lastrowid
+                else:
+                    run_ids[dirpath] = run_ids.get(os.path.dirname(dirpath))
+
+                rows = []
+                for name in sorted(filenames):
+                    full_path = os.path.join(dirpath, name)
+                    # The catalog itself and its -journal/-wal files
+                    if os.path.abspath(full_path).startswith(os.path.abspath(db_path)):
+                        continue
+                    stat = os.stat(full_path)
+                    ext, kind, nf = classify(name)
+                    rows.append((run_ids[dirpath], os.path.relpath(full_path, root), name, ext, kind, nf,
+                                 stat.st_size, stat.st_mtime))
+                conn.executemany(
+                    "INSERT INTO files (run_id, path, name, ext, kind, nf, size, mtime) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+    finally:
+        conn.close()
+    return db_path
+
+
+class Catalog:
+    """Read side of a catalog: runs and files as dicts, paths made absolute."""
+
+    RUN_COLUMNS = ["source", "core", "operation", "ue_count", "mode", "mean_delay", "timestamp"]
+
+    def __init__(self, db_path):
+        if not os.path.isfile(db_path):
+            raise FileNotFoundError(f"No catalog at {db_path}: build it with catalog.py --input <root>")
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.root = self.conn.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _where(filters):
+        clauses, params = [], []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def runs(self, **filters):
+        """Runs matching column filters (scalar = equality, list = membership)."""
+        where, params = self._where(filters)
+        rows = self.conn.execute(f"SELECT * FROM runs{where} ORDER BY path", params).fetchall()
+        return [dict(row, path=os.path.join(self.root, row["path"]), rel_path=row["path"]) for row in rows]
+
+    def files(self, in_run=True, **filters):
+        """
+        Files with the metadata of their run. Filters apply to file columns
+        (ext, kind, nf, name) and run columns (core, operation, ue_count, ...).
+        in_run=False also returns files outside any run directory.
+        """
+        prefixed = {
+            (f"r.{column}" if column in self.RUN_COLUMNS else f"f.{column}"): value
+            for column, value in filters.items()
+        }
+        where, params = self._where(prefixed)
+        join = "JOIN" if in_run else "LEFT JOIN"
+        rows = self.conn.execute(
+            f"SELECT f.*, r.path AS run_path, r.name AS run_name, r.parent AS run_parent, "
+            f"{', '.join('r.' + column for column in self.RUN_COLUMNS)} "
+            f"FROM files f {join} runs r ON f.run_id = r.id{where} ORDER BY f.path",
+            params,
+        ).fetchall()
+        results = []
+        for row in rows:
+            entry = dict(row)
+            entry["rel_path"] = entry["path"]
+            entry["path"] = os.path.join(self.root, entry["path"])
+            if entry["run_path"] is not None:
+                entry["run_path"] = os.path.join(self.root, entry["run_path"])
+            results.append(entry)
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index capture runs and their files into a SQLite catalog")
+    parser.add_argument("--input", "-i", required=True, help="Capture (or results) root to scan")
+    parser.add_argument("--db", help=f"Catalog path (default: <input>/{CATALOG_NAME})")
+    args = parser.parse_args()
+
+    db_path = build_catalog(args.input, args.db)
+    catalog = Catalog(db_path)
+    runs = catalog.runs()
+    files = catalog.files(in_run=False)
+    catalog.close()
+    print(f"✅ Catalog: {len(runs)} runs, {len(files)} files → {db_path}")
@@ -1,5 +1,12 @@
 import os
+import json
+import hashlib
+import shutil
 import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ngap_reader import tshark_fields_args
 
 # To delete all JSON and PDML file recursively:
 #   find /mnt/c/Dev/master/pcap_captures/aether -type f \( -name "*.json" -o -name "*.pdml" \) -delete
@@ -31,6 +38,12 @@ NF_FILTERS = {
     }
 }
 
+# Chunk size used when streaming tshark output to disk
+CHUNK_SIZE = 1024 * 1024
+
+# Written next to micro_data/macro_data, records what each output was built from
+MANIFEST_NAME = "conversion_manifest.json"
+
 def extract_nf(file_name: str) -> str:
     name = file_name.lower()
     # for nf in ["amf", "ausf", "udm", "smf", "pcf", "nrf", "bsf", "scp", "nssf", "udr", "upf"]:
@@ -45,104 +58,255 @@ def extract_ue_count(folder_name: str) -> str:
     parts = folder_name.split("-")
     return parts[0] if parts and parts[0].isdigit() else "X"
 
-def convert_pcap_recursive(root_dir: str, core: str):
+def plan_conversion(dirpath: str, file: str, core: str, ngap_format: str = "pdml"):
+    input_path = os.path.join(dirpath, file)
+    base_filename = os.path.splitext(file)[0]
+
+    # Check if it's a ueransim capture
+    is_ueransim = "ueransim" in file.lower()
+
+    nf_type = None
+    for nf in NF_FILTERS.get(core, {}):
+        if nf in file.lower():
+            nf_type = nf
+            break
+
+    target_subdir_name = os.path.basename(dirpath)  # Use parent folder name in all cases
+
+    if is_ueransim:
+        nf_name = "ueransim"
+        output_ext = ".pdml"
+        tshark_format = "pdml"
+        display_filter = "ngap"
+        subfolder = "macro_data"
+
+    elif nf_type:
+        if nf_type not in NF_FILTERS[core]:
+            print(f"[SKIP] NF '{nf_type}' not in allowed filters for core '{core}': {file}")
+            return None
+        nf_name = nf_type
+        nf_config = NF_FILTERS[core][nf_type]
+        tshark_format = nf_config["format"]
+        display_filter = nf_config["filter"]
+        output_ext = f".{tshark_format}"
+        subfolder = "micro_data"
+
+    else:
+        nf_name = "unknown"
+        output_ext = ".json"
+        tshark_format = "json"
+        display_filter = "tcp"
+        subfolder = "micro_data"
+
+    # NGAP captures can be reduced to the handful of fields the NGAP parsers read
+    if display_filter == "ngap" and ngap_format == "fields":
+        tshark_format = "fields"
+        output_ext = ".tsv"
+
+    output_filename = f"{base_filename}{output_ext}"
+
+    # Save one level up, in named subfolder
+    parent_dir = os.path.dirname(dirpath)
+    target_dir = os.path.join(parent_dir, subfolder, target_subdir_name)
+
+    return {
+        "input_path": input_path,
+        "parent_dir": parent_dir,
+        "nf": nf_name,
+        "target_dir": target_dir,
+        "output_filename": output_filename,
+        "output_path": os.path.join(target_dir, output_filename),
+        "tshark_format": tshark_format,
+        "display_filter": display_filter,
+        "size": os.path.getsize(input_path),
+        "mtime": os.path.getmtime(input_path),
+    }
+
+# === Conversion manifest ===
+def get_tshark_version() -> str:
+    try:
+        result = subprocess.run(["tshark", "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        return result.stdout.splitlines()[0].strip() if result.stdout else "unknown"
+    except OSError:
+        return "unknown"
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(parent_dir: str) -> dict:
+    manifest_path = os.path.join(parent_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"[WARN] Ignoring unreadable manifest: {manifest_path}")
+        return {}
+
+def save_manifest(parent_dir: str, manifest: dict):
+    manifest_path = os.path.join(parent_dir, MANIFEST_NAME)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+def manifest_key(job: dict) -> str:
+    return os.path.relpath(job["input_path"], job["parent_dir"])
+
+def is_up_to_date(job: dict, entry: dict, tshark_version: str) -> bool:
+    """True if the recorded conversion was built from this exact capture and settings."""
+    if not entry or not os.path.exists(job["output_path"]):
+        return False
+    if (entry.get("filter"), entry.get("format"), entry.get("tshark_version")) != (job["display_filter"], job["tshark_format"], tshark_version):
+        return False
+    if entry.get("size") != job["size"]:
+        return False
+    if entry.get("mtime") == job["mtime"]:
+        return True
+    # Same size but touched/copied: fall back to the content hash
+    if entry.get("sha256") == file_sha256(job["input_path"]):
+        entry["mtime"] = job["mtime"]
+        return True
+    return False
+
+def run_conversion(job: dict):
+    """Run tshark for one planned job. Returns (status, message, sha256 of the capture or None)."""
+    input_path = job["input_path"]
+    output_filename = job["output_filename"]
+    os.makedirs(job["target_dir"], exist_ok=True)
+
+    # Run tshark
+    tshark_cmd = [
+        "tshark",
+        "-r", input_path,
+        "-Y", job["display_filter"],
+        "-T", job["tshark_format"]
+    ]
+    if job["tshark_format"] == "fields":
+        tshark_cmd += tshark_fields_args()
+
+    # Stream tshark stdout to a partial file in fixed-size chunks, so large
+    # captures never sit in memory. stderr goes to a temp file to avoid
+    # blocking on a full pipe while stdout is being drained.
+    partial_output = job["output_path"] + ".part"
+    try:
+        with tempfile.TemporaryFile() as stderr_file, open(partial_output, "wb") as f:
+            proc = subprocess.Popen(
+                tshark_cmd,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file
+            )
+            shutil.copyfileobj(proc.stdout, f, CHUNK_SIZE)
+            proc.stdout.close()
+            proc.wait()
+
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode("utf-8", errors="replace").strip()
+
+        if stderr:
+            if "network type" in stderr or "doesn't support" in stderr:
+                os.remove(partial_output)
+                return "SKIP", f"[SKIP] Unsupported format: {input_path}", None
+            elif "Running as user" in stderr:
+                message = f"[OK] Converted with root warning: {input_path}"
+            else:
+                os.remove(partial_output)
+                return "ERROR", f"[ERROR] {input_path}: {stderr}", None
+        else:
+            message = f"[OK] Converted: {input_path} -> {output_filename}"
+
+        # Save only to target subfolder (micro_data or macro_data)
+        os.replace(partial_output, job["output_path"])
+
+        return "OK", message, file_sha256(input_path)
+
+    except Exception as e:
+        if os.path.exists(partial_output):
+            os.remove(partial_output)
+        return "ERROR", f"[FAIL] {input_path}: {e}", None
+
+def convert_pcap_recursive(root_dir: str, core: str, jobs: int = 1, force: bool = False, only=None, ngap_format: str = "pdml"):
+    planned = []
     for dirpath, _, filenames in os.walk(root_dir):
         for file in filenames:
             if not file.endswith(".pcap"):
                 continue
+            job = plan_conversion(dirpath, file, core, ngap_format)
+            if job and (not only or job["nf"] in only):
+                planned.append(job)
 
-            input_path = os.path.join(dirpath, file)
-            base_filename = os.path.splitext(file)[0]
-
-            # Check if it's a ueransim capture
-            is_ueransim = "ueransim" in file.lower()
+    tshark_version = get_tshark_version()
+    manifests = {}
+    summary = {"OK": 0, "CACHED": 0, "SKIP": 0, "ERROR": 0}
+    total = len(planned)
+    done = 0
 
-            nf_type = None
-            for nf in NF_FILTERS.get(core, {}):
-                if nf in file.lower():
-                    nf_type = nf
-                    break
+    # Drop captures whose output is already up to date
+    pending = []
+    for job in planned:
+        manifest = manifests.setdefault(job["parent_dir"], load_manifest(job["parent_dir"]))
+        if not force and is_up_to_date(job, manifest.get(manifest_key(job)), tshark_version):
+            done += 1
+            summary["CACHED"] += 1
+            print(f"[{done}/{total}] [CACHED] Up to date: {job['input_path']}")
+        else:
+            pending.append(job)
 
-            target_subdir_name = os.path.basename(dirpath)  # Use parent folder name in all cases
+    def record(job, status, message, sha256):
+        nonlocal done
+        done += 1
+        summary[status] += 1
+        print(f"[{done}/{total}] {message}")
 
-            if is_ueransim:
-                output_ext = ".pdml"
-                tshark_format = "pdml"
-                display_filter = "ngap"
-                subfolder = "macro_data"
+        manifest = manifests[job["parent_dir"]]
+        if status == "OK":
+            manifest[manifest_key(job)] = {
+                "output": os.path.relpath(job["output_path"], job["parent_dir"]),
+                "size": job["size"],
+                "mtime": job["mtime"],
+                "sha256": sha256,
+                "filter": job["display_filter"],
+                "format": job["tshark_format"],
+                "tshark_version": tshark_version,
+            }
+        else:
+            manifest.pop(manifest_key(job), None)
 
-            elif nf_type:
-                if nf_type not in NF_FILTERS[core]:
-                    print(f"[SKIP] NF '{nf_type}' not in allowed filters for core '{core}': {file}")
-                    continue
-                nf_config = NF_FILTERS[core][nf_type]
-                tshark_format = nf_config["format"]
-                display_filter = nf_config["filter"]
-                output_ext = f".{tshark_format}"
-                subfolder = "micro_data"
-
-            else:
-                output_ext = ".json"
-                tshark_format = "json"
-                display_filter = "tcp"
-                subfolder = "micro_data"
-
-            output_filename = f"{base_filename}{output_ext}"
-
-            # Save one level up, in named subfolder
-            parent_dir = os.path.dirname(dirpath)
-            target_dir = os.path.join(parent_dir, subfolder, target_subdir_name)
-            os.makedirs(target_dir, exist_ok=True)
-            one_up_output = os.path.join(target_dir, output_filename)
-
-            # Run tshark
-            tshark_cmd = [
-                "tshark",
-                "-r", input_path,
-                "-Y", display_filter,
-                "-T", tshark_format
-            ]
-
-            try:
-                result = subprocess.run(
-                    tshark_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-
-                stderr = result.stderr.strip()
-                output_data = result.stdout
-
-                if stderr:
-                    if "network type" in stderr or "doesn't support" in stderr:
-                        print(f"[SKIP] Unsupported format: {input_path}")
-                        continue
-                    elif "Running as user" in stderr:
-                        print(f"[OK] Converted with root warning: {input_path}")
-                    else:
-                        print(f"[ERROR] {input_path}: {stderr}")
-                        continue
-                else:
-                    print(f"[OK] Converted: {input_path} -> {output_filename}")
-
-                # Save only to target subfolder (micro_data or macro_data)
-                with open(one_up_output, "w") as f:
-                    f.write(output_data)
-
-            except Exception as e:
-                print(f"[FAIL] {input_path}: {e}")
+    try:
+        if jobs > 1:
+            # Largest captures first so the slowest conversions don't end up as the tail
+            pending.sort(key=lambda j: j["size"], reverse=True)
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = {executor.submit(run_conversion, job): job for job in pending}
+                for future in as_completed(futures):
+                    record(futures[future], *future.result())
+        else:
+            for job in pending:
+                record(job, *run_conversion(job))
+    finally:
+        for parent_dir, manifest in manifests.items():
+            save_manifest(parent_dir, manifest)
 
+    print(f"\n[SUMMARY] {total} capture(s): {summary['OK']} OK, {summary['CACHED']} CACHED, {summary['SKIP']} SKIP, {summary['ERROR']} ERROR")
+    return summary
 
 
 if __name__ == "__main__":
     import argparse
 
-    parser = argparse.ArgumentParser(description="Recursively convert .pcap files to JSON or PDML.")
+    parser = argparse.ArgumentParser(description="Recursively convert .pcap files to JSON, PDML or NGAP field TSV.")
     parser.add_argument("--input", "-i", required=True, help="Root directory containing .pcap files")
     parser.add_argument("--core", "-c", required=True, choices=NF_FILTERS.keys(), help="5G core type")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of parallel tshark workers")
+    parser.add_argument("--force", "-f", action="store_true", help="Reconvert even if the manifest says the output is up to date")
+    parser.add_argument("--only", nargs="+", help="Only convert captures of these NFs (e.g. amf udm ueransim)")
+    parser.add_argument("--ngap-format", choices=["pdml", "fields"], default="pdml", help="Full PDML or compact field TSV for NGAP captures")
     args = parser.parse_args()
     # /mnt/c/Dev/master/pcap_captures/aether
 
-    convert_pcap_recursive(args.input, args.core)
+    convert_pcap_recursive(args.input, args.core, jobs=args.jobs, force=args.force, only=args.only, ngap_format=args.ngap_format)
 
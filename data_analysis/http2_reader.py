@@ -0,0 +1,551 @@
+import ipaddress
+
+from pcap_reader import iter_frames, link_layer, tcp_segment, format_relative
+from ngap_reader import pkttype_to_direction
+
+# Rebuilds the TCP byte streams of a .pcap/.pcapng capture per connection and
+# decodes the cleartext HTTP/2 (h2c) SBI traffic on top of them: frames, HPACK
+# header blocks and stream lifecycles. Every HTTP/2 stream becomes one
+# request/response record with the frame numbers and capture timestamps of its
+# first and last frames, so SBI latency comes from real stream IDs rather than
+# from pattern matching on single segments.
+
+HTTP2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+# === HTTP/2 frame types and flags (RFC 9113) ===
+FRAME_DATA = 0x0
+FRAME_HEADERS = 0x1
+FRAME_RST_STREAM = 0x3
+FRAME_SETTINGS = 0x4
+FRAME_PUSH_PROMISE = 0x5
+FRAME_CONTINUATION = 0x9
+
+FLAG_END_STREAM = 0x1
+FLAG_END_HEADERS = 0x4
+FLAG_PADDED = 0x8
+FLAG_PRIORITY = 0x20
+
+SEQ_MASK = 0xFFFFFFFF
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+
+# Out-of-order segments held per direction before the gap is treated as lost
+MAX_PENDING_SEGMENTS = 1024
+# Leading request body bytes kept per stream (record["request_head"]), enough for a "supi" field
+REQUEST_HEAD_BYTES = 1024
+
+RECORD_FIELDS = [
+    "client", "server", "stream_id", "method", "path", "authority", "status", "location",
+    "request_direction",
+    "request_frame", "request_time", "request_end_frame", "request_end_time",
+    "response_frame", "response_time", "response_end_frame", "response_end_time",
+    "request_bytes", "response_bytes", "reset",
+]
+
+
+class HpackError(ValueError):
+    pass
+
+
+# === HPACK (RFC 7541) ===
+STATIC_TABLE = [
+    (b":authority", b""),
+    (b":method", b"GET"),
+    (b":method", b"POST"),
+    (b":path", b"/"),
+    (b":path", b"/index.html"),
+    (b":scheme", b"http"),
+    (b":scheme", b"https"),
+    (b":status", b"200"),
+    (b":status", b"204"),
+    (b":status", b"206"),
+    (b":status", b"304"),
+    (b":status", b"400"),
+    (b":status", b"404"),
+    (b":status", b"500"),
+    (b"accept-charset", b""),
+    (b"accept-encoding", b"gzip, deflate"),
+    (b"accept-language", b""),
+    (b"accept-ranges", b""),
+    (b"accept", b""),
+    (b"access-control-allow-origin", b""),
+    (b"age", b""),
+    (b"allow", b""),
+    (b"authorization", b""),
+    (b"cache-control", b""),
+    (b"content-disposition", b""),
+    (b"content-encoding", b""),
+    (b"content-language", b""),
+    (b"content-length", b""),
+    (b"content-location", b""),
+    (b"content-range", b""),
+    (b"content-type", b""),
+    (b"cookie", b""),
+    (b"date", b""),
+    (b"etag", b""),
+    (b"expect", b""),
+    (b"expires", b""),
+    (b"from", b""),
+    (b"host", b""),
+    (b"if-match", b""),
+    (b"if-modified-since", b""),
+    (b"if-none-match", b""),
+    (b"if-range", b""),
+    (b"if-unmodified-since", b""),
+    (b"last-modified", b""),
+    (b"link", b""),
+    (b"location", b""),
+    (b"max-forwards", b""),
+    (b"proxy-authenticate", b""),
+    (b"proxy-authorization", b""),
+    (b"range", b""),
+    (b"referer", b""),
+    (b"refresh", b""),
+    (b"retry-after", b""),
+    (b"server", b""),
+    (b"set-cookie", b""),
+    (b"strict-transport-security", b""),
+    (b"transfer-encoding", b""),
+    (b"user-agent", b""),
+    (b"vary", b""),
+    (b"via", b""),
+    (b"www-authenticate", b""),
+]
+
+# Huffman code length of every octet (RFC 7541 Appendix B). The code is
+# canonical, so the codes themselves follow from the lengths.
+HUFFMAN_CODE_LENGTHS = [
+    13, 23, 28, 28, 28, 28, 28, 28, 28, 24, 30, 28, 28, 30, 28, 28,
+    28, 28, 28, 28, 28, 28, 30, 28, 28, 28, 28, 28, 28, 28, 28, 28,
+    6, 10, 10, 12, 13, 6, 8, 11, 10, 10, 8, 11, 8, 6, 6, 6,
+    5, 5, 5, 6, 6, 6, 6, 6, 6, 6, 7, 8, 15, 6, 12, 10,
+    13, 6, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7,
+    7, 7, 7, 7, 7, 7, 7, 7, 8, 7, 8, 13, 19, 13, 14, 6,
+    15, 5, 6, 5, 6, 5, 6, 6, 6, 5, 7, 7, 6, 6, 6, 5,
+    6, 7, 6, 5, 5, 6, 7, 7, 7, 7, 7, 15, 11, 14, 13, 28,
+    20, 22, 20, 20, 22, 22, 22, 23, 22, 23, 23, 23, 23, 23, 24, 23,
+    24, 24, 22, 23, 24, 23, 23, 23, 23, 21, 22, 23, 22, 23, 23, 24,
+    22, 21, 20, 22, 22, 23, 23, 21, 23, 22, 22, 24, 21, 22, 23, 23,
+    21, 21, 22, 21, 23, 22, 23, 23, 20, 22, 22, 22, 23, 22, 22, 23,
+    26, 26, 20, 19, 22, 23, 22, 25, 26, 26, 26, 27, 27, 26, 24, 25,
+    19, 21, 26, 27, 27, 26, 27, 24, 21, 21, 26, 26, 28, 27, 27, 27,
+    20, 24, 20, 21, 22, 21, 21, 23, 22, 22, 25, 25, 24, 24, 26, 23,
+    26, 27, 26, 26, 27, 27, 27, 27, 27, 28, 27, 27, 27, 27, 27, 26,
+]
+HUFFMAN_EOS_LENGTH = 30
+
+
+def _huffman_decode_table():
+    symbols = sorted(range(256), key=lambda sym: (HUFFMAN_CODE_LENGTHS[sym], sym))
+    table = {}
+    code = 0
+    length = HUFFMAN_CODE_LENGTHS[symbols[0]]
+    for sym in symbols:
+        code <<= HUFFMAN_CODE_LENGTHS[sym] - length
+        length = HUFFMAN_CODE_LENGTHS[sym]
+        table[(length, code)] = sym
+        code += 1
+    return table
+
+
+_HUFFMAN_DECODE = _huffman_decode_table()
+
+
+def huffman_decode(data):
+    out = bytearray()
+    code = 0
+    length = 0
+    for byte in data:
+        for shift in range(7, -1, -1):
+            code = (code << 1) | ((byte >> shift) & 1)
+            length += 1
+            sym = _HUFFMAN_DECODE.get((length, code))
+            if sym is not None:
+                out.append(sym)
+                code = 0
+                length = 0
+            elif length >= HUFFMAN_EOS_LENGTH:
+                raise HpackError("Invalid Huffman code")
+    # Padding must be the most significant bits of EOS (all ones), shorter than an octet
+    if length > 7 or code != (1 << length) - 1:
+        raise HpackError("Invalid Huffman padding")
+    return bytes(out)
+
+
+class HpackDecoder:
+    """Header block decoder for one direction of an HTTP/2 connection."""
+
+    def __init__(self, max_size=4096):
+        self.dynamic = []  # newest entry first
+        self.size = 0
+        self.max_size = max_size
+
+    def _evict(self):
+        while self.size > self.max_size and self.dynamic:
+            name, value = self.dynamic.pop()
+            self.size -= len(name) + len(value) + 32
+
+    def _add(self, name, value):
+        self.dynamic.insert(0, (name, value))
+        self.size += len(name) + len(value) + 32
+        self._evict()
+
+    def _entry(self, index):
+        if 1 <= index <= len(STATIC_TABLE):
+            return STATIC_TABLE[index - 1]
+        index -= len(STATIC_TABLE) + 1
+        if 0 <= index < len(self.dynamic):
+            return self.dynamic[index]
+        raise HpackError(f"Header table index out of range: {index}")
+
+    @staticmethod
+    def _integer(block, pos, prefix_bits):
+        mask = (1 << prefix_bits) - 1
+        value = block[pos] & mask
+        pos += 1
+        if value < mask:
+            return value, pos
+        shift = 0
+        while True:
+            if pos >= len(block):
+                raise HpackError("Truncated integer")
+            byte = block[pos]
+            pos += 1
+            value += (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value, pos
+
+    def _string(self, block, pos):
+        if pos >= len(block):
+            raise HpackError("Truncated string")
+        huffman = block[pos] & 0x80
+        length, pos = self._integer(block, pos, 7)
+        if pos + length > len(block):
+            raise HpackError("Truncated string")
+        raw = bytes(block[pos:pos + length])
+        return (huffman_decode(raw) if huffman else raw), pos + length
+
+    def decode(self, block):
+        """Decode a complete header block into a list of (name, value) byte pairs."""
+        headers = []
+        pos = 0
+        while pos < len(block):
+            byte = block[pos]
+            if byte & 0x80:  # indexed header field
+                index, pos = self._integer(block, pos, 7)
+                headers.append(self._entry(index))
+                continue
+            if byte & 0xE0 == 0x20:  # dynamic table size update
+                self.max_size, pos = self._integer(block, pos, 5)
+                self._evict()
+                continue
+
+            # Literal: with incremental indexing (01), without (0000) or never indexed (0001)
+            indexing = byte & 0xC0 == 0x40
+            index, pos = self._integer(block, pos, 6 if indexing else 4)
+            if index:
+                name = self._entry(index)[0]
+            else:
+                name, pos = self._string(block, pos)
+            value, pos = self._string(block, pos)
+            if indexing:
+                self._add(name, value)
+            headers.append((name, value))
+        return headers
+
+
+# === TCP reassembly ===
+class TcpReassembler:
+    """
+    In-order byte stream for one direction of a TCP connection. feed() returns
+    the data that became contiguous with this segment, which may include earlier
+    out-of-order segments. Retransmissions and overlaps are trimmed.
+    """
+
+    def __init__(self):
+        self.next_seq = None
+        self.pending = {}  # seq -> data
+        self.broken = False
+
+    def feed(self, seq, flags, data):
+        if flags & TCP_SYN:
+            self.next_seq = (seq + 1) & SEQ_MASK
+            self.pending.clear()
+            return []
+        if self.broken or not data:
+            return []
+        if self.next_seq is None:  # capture started mid-connection
+            self.next_seq = seq
+
+        if len(data) > len(self.pending.get(seq, b"")):
+            self.pending[seq] = data
+
+        pieces = []
+        progress = True
+        while progress:
+            progress = False
+            for start in list(self.pending):
+                offset = (self.next_seq - start) & SEQ_MASK
+                if offset >= 1 << 31:  # still ahead of the stream
+                    continue
+                chunk = self.pending.pop(start)
+                if offset < len(chunk):
+                    pieces.append(chunk[offset:])
+                    self.next_seq = (self.next_seq + len(chunk) - offset) & SEQ_MASK
+                    progress = True
+
+        # A segment missing from the capture leaves a gap that never closes
+        if len(self.pending) > MAX_PENDING_SEGMENTS:
+            self.broken = True
+            self.pending.clear()
+        return pieces
+
+
+# === HTTP/2 ===
+class Http2Direction:
+    """Frame parser plus HPACK state for the bytes one peer sends."""
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.checked = False
+        self.is_client = False
+        self.active = True
+        self.hpack = HpackDecoder()
+        self.header_block = None  # (stream_id, flags, fragments, frame_number, ts_ns) while CONTINUATIONs follow
+
+    def feed(self, data):
+        """Append stream bytes and return the complete frames as (type, flags, stream_id, payload)."""
+        if not self.active:
+            return []
+        self.buf += data
+
+        if not self.checked:
+            if len(self.buf) < len(HTTP2_PREFACE) and HTTP2_PREFACE.startswith(bytes(self.buf)):
+                return []
+            self.checked = True
+            if self.buf.startswith(HTTP2_PREFACE):
+                self.is_client = True
+                del self.buf[:len(HTTP2_PREFACE)]
+            elif len(self.buf) >= 9 and self.buf[3] == FRAME_SETTINGS and not any(self.buf[5:9]):
+                pass  # server side: its first frame is SETTINGS on stream 0
+            else:
+                # Not h2c, or picked up mid-connection where HPACK state is unknown
+                self.active = False
+                self.buf.clear()
+                return []
+
+        frames = []
+        pos = 0
+        while len(self.buf) - pos >= 9:
+            length = int.from_bytes(self.buf[pos:pos + 3], "big")
+            if len(self.buf) - pos < 9 + length:
+                break
+            frame_type = self.buf[pos + 3]
+            flags = self.buf[pos + 4]
+            stream_id = int.from_bytes(self.buf[pos + 5:pos + 9], "big") & 0x7FFFFFFF
+            frames.append((frame_type, flags, stream_id, bytes(self.buf[pos + 9:pos + 9 + length])))
+            pos += 9 + length
+        del self.buf[:pos]
+        return frames
+
+
+def _strip_padding(payload, flags):
+    if flags & FLAG_PADDED:
+        if not payload or payload[0] >= len(payload):
+            raise ValueError("Invalid padding")
+        return payload[1:len(payload) - payload[0]]
+    return payload
+
+
+def _header_fragment(frame_type, payload, flags):
+    payload = _strip_padding(payload, flags)
+    if frame_type == FRAME_HEADERS and flags & FLAG_PRIORITY:
+        return payload[5:]
+    if frame_type == FRAME_PUSH_PROMISE:
+        return payload[4:]  # promised stream id
+    return payload
+
+
+class Http2Connection:
+    """Both directions of one TCP connection and the HTTP/2 streams open on it."""
+
+    def __init__(self, endpoint_a, endpoint_b):
+        self.endpoints = (endpoint_a, endpoint_b)
+        self.tcp = {endpoint_a: TcpReassembler(), endpoint_b: TcpReassembler()}
+        self.http2 = {endpoint_a: Http2Direction(), endpoint_b: Http2Direction()}
+        self.streams = {}
+        self.finished = set()  # endpoints that sent FIN
+
+    @property
+    def started(self):
+        return any(h2.checked for h2 in self.http2.values())
+
+    def _stream(self, stream_id, client, server):
+        stream = self.streams.get(stream_id)
+        if stream is None:
+            stream = dict.fromkeys(RECORD_FIELDS, "")
+            stream.update(client=client, server=server, stream_id=stream_id,
+                          request_bytes=0, response_bytes=0, reset=False, request_head=b"")
+            self.streams[stream_id] = stream
+        return stream
+
+    def feed(self, sender, seq, flags, data, frame_number, ts_ns, direction):
+        """Feed one TCP segment sent by `sender`; return the records of streams that completed."""
+        receiver = self.endpoints[1] if sender == self.endpoints[0] else self.endpoints[0]
+        h2 = self.http2[sender]
+        completed = []
+
+        # Frames are stamped with the segment that made them readable, as the NF saw them
+        for piece in self.tcp[sender].feed(seq, flags, data):
+            try:
+                frames = h2.feed(piece)
+            except ValueError:
+                h2.active = False
+                continue
+            for frame in frames:
+                try:
+                    record = self._on_frame(h2, sender, receiver, frame, frame_number, ts_ns, direction)
+                except ValueError:
+                    # Lost HPACK sync: nothing after this point in the direction can be trusted
+                    h2.active = False
+                    break
+                if record:
+                    completed.append(record)
+        return completed
+
+    def _on_frame(self, h2, sender, receiver, frame, frame_number, ts_ns, direction):
+        frame_type, flags, stream_id, payload = frame
+        client, server = (sender, receiver) if h2.is_client else (receiver, sender)
+
+        if frame_type in (FRAME_HEADERS, FRAME_PUSH_PROMISE):
+            h2.header_block = (stream_id, flags, frame_type, [_header_fragment(frame_type, payload, flags)], frame_number, ts_ns)
+            if not flags & FLAG_END_HEADERS:
+                return None
+        elif frame_type == FRAME_CONTINUATION and h2.header_block:
+            h2.header_block[3].append(payload)
+            if not flags & FLAG_END_HEADERS:
+                return None
+        elif frame_type == FRAME_DATA and stream_id in self.streams:
+            stream = self.streams[stream_id]
+            body = _strip_padding(payload, flags)
+            if h2.is_client:
+                stream["request_bytes"] += len(body)
+                if len(stream["request_head"]) < REQUEST_HEAD_BYTES:
+                    stream["request_head"] += body[:REQUEST_HEAD_BYTES - len(stream["request_head"])]
+            else:
+                stream["response_bytes"] += len(body)
+            return self._end_stream(stream, h2.is_client, flags, frame_number, ts_ns)
+        elif frame_type == FRAME_RST_STREAM and stream_id in self.streams:
+            stream = self.streams.pop(stream_id)
+            stream["reset"] = True
+            stream["response_end_frame"] = frame_number
+            stream["response_end_time"] = ts_ns
+            return stream
+        else:
+            return None
+
+        # A header block is complete: decode it even when unused, to keep the HPACK table in sync
+        block_stream, first_flags, block_type, fragments, first_frame, first_ts = h2.header_block
+        h2.header_block = None
+        headers = h2.hpack.decode(b"".join(fragments))
+        if block_type == FRAME_PUSH_PROMISE:
+            return None
+
+        fields = {}
+        for name, value in headers:
+            if name.startswith(b":") or name == b"location":
+                fields.setdefault(name.decode("ascii", "replace"), value.decode("utf-8", "replace"))
+
+        stream = self._stream(block_stream, client, server)
+        if h2.is_client:
+            if not stream["request_frame"]:
+                stream.update(method=fields.get(":method", ""), path=fields.get(":path", ""),
+                              authority=fields.get(":authority", ""), request_direction=direction,
+                              request_frame=first_frame, request_time=first_ts)
+        else:
+            status = fields.get(":status", "")
+            # Interim 1xx responses do not answer the request
+            if status and not status.startswith("1") and not stream["status"]:
+                stream.update(status=status, location=fields.get("location", ""),
+                              response_frame=first_frame, response_time=first_ts)
+        return self._end_stream(stream, h2.is_client, first_flags, frame_number, ts_ns)
+
+    def _end_stream(self, stream, from_client, flags, frame_number, ts_ns):
+        if not flags & FLAG_END_STREAM:
+            return None
+        if from_client:
+            stream["request_end_frame"] = frame_number
+            stream["request_end_time"] = ts_ns
+            return None
+        stream["response_end_frame"] = frame_number
+        stream["response_end_time"] = ts_ns
+        return self.streams.pop(stream["stream_id"])
+
+    def flush(self):
+        """Return the streams still open when the capture ended."""
+        records = list(self.streams.values())
+        self.streams.clear()
+        return records
+
+
+def _format_record(record, first_ns):
+    for key in ("request_time", "request_end_time", "response_time", "response_end_time"):
+        if record[key] != "":
+            record[key] = format_relative(record[key] - first_ns)
+    for key in ("client", "server"):
+        address = ipaddress.ip_address(record[key][0])
+        host = f"[{address}]" if address.version == 6 else str(address)
+        record[key] = f"{host}:{record[key][1]}"
+    return record
+
+
+def read_pcap_http2(path):
+    """
+    Read a .pcap/.pcapng capture and yield one dict per HTTP/2 stream (RECORD_FIELDS,
+    plus the raw request_head bytes), in the order the streams complete. Streams still open at the end of the
+    capture are yielded last, without response fields.
+    """
+    first_ns = None
+    connections = {}
+
+    for frame_number, ts_ns, linktype, data in iter_frames(path):
+        if first_ns is None:
+            first_ns = ts_ns
+
+        link = link_layer(linktype, data)
+        if not link:
+            continue
+        pkttype, ethertype, packet = link
+        tcp = tcp_segment(ethertype, packet)
+        if not tcp:
+            continue
+        src, src_port, dst, dst_port, seq, flags, payload = tcp
+
+        sender = (src, src_port)
+        key = frozenset((sender, (dst, dst_port)))
+        connection = connections.get(key)
+
+        # A fresh SYN on a known 4-tuple is a new connection reusing the ports
+        if connection is None or (flags & TCP_SYN and not flags & TCP_ACK and connection.started):
+            if connection is not None:
+                for record in connection.flush():
+                    yield _format_record(record, first_ns)
+            connection = connections[key] = Http2Connection(sender, (dst, dst_port))
+
+        direction = pkttype_to_direction(pkttype) or "unknown"
+        for record in connection.feed(sender, seq, flags, payload, frame_number, ts_ns, direction):
+            yield _format_record(record, first_ns)
+
+        if flags & TCP_FIN:
+            connection.finished.add(sender)
+        if flags & TCP_RST or len(connection.finished) == 2:
+            for record in connection.flush():
+                yield _format_record(record, first_ns)
+            del connections[key]
+
+    for connection in connections.values():
+        for record in connection.flush():
+            yield _format_record(record, first_ns)
@@ -1,11 +1,18 @@
 import os
 import re
+import sys
 import csv
 import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from render import RenderJob, CACHE_NAME, render_all
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from parquet_store import load_delta_groups, load_delta_stats
+from quantile_sketch import StreamingStats, stats_from_csv_files
+
 CORE_NAME_MAP = {
     "open5gs": "Open5GS",
     "free5gc": "Free5GC",
@@ -26,25 +33,55 @@ OP_NAME_MAP = {
     "pdu_rel": "PDU Session Release",
 }
 
+def file_label(csv_path):
+    match = re.match(r"^(\d+)", os.path.basename(csv_path))
+    return match.group(1) if match else "X"
+
 def load_grouped_data(csv_files):
     core_data = {}
     for csv_path in csv_files:
-        filename = os.path.basename(csv_path)
-        match = re.match(r"^(\d+)", filename)
-        label = match.group(1) if match else "X"
+        label = file_label(csv_path)
 
         df = pd.read_csv(csv_path)
         if 'delta_ms' in df.columns:
             core_data.setdefault(label, []).extend(df['delta_ms'].dropna().tolist())
     return core_data
 
+def load_sketched_data(csv_files):
+    return stats_from_csv_files(csv_files, file_label)
+
+def sketch_box_stats(stats, label=None):
+    """Box plot statistics (for Axes.bxp) from a StreamingStats; outliers are counted, not drawn."""
+    q1, median, q3 = stats.percentile(25), stats.percentile(50), stats.percentile(75)
+    iqr = q3 - q1
+    return {
+        "label": label,
+        "med": median,
+        "q1": q1,
+        "q3": q3,
+        "mean": stats.mean,
+        "whislo": max(stats.min, q1 - 1.5 * iqr),
+        "whishi": min(stats.max, q3 + 1.5 * iqr),
+        "fliers": [],
+    }
+
+def min_value(data):
+    if isinstance(data[0], StreamingStats):
+        return min(d.min for d in data)
+    return min([min(d) for d in data if d])
+
 def plot_box(core_data, title, output_img, logy=False, core_name=None):
     labels = sorted(core_data.keys())
     data = [core_data[label] for label in labels]
-    min_val = min([min(d) for d in data if d]) if logy else 1
+    min_val = min_value(data) if logy else 1
 
-    plt.figure(figsize=(10, 6))
-    box = plt.boxplot(data, labels=labels, showmeans=True, patch_artist=True)
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    if isinstance(data[0], StreamingStats):
+        box = ax.bxp([sketch_box_stats(d, label) for d, label in zip(data, labels)],
+                     showmeans=True, patch_artist=True)
+    else:
+        box = ax.boxplot(data, labels=labels, showmeans=True, patch_artist=True)
 
     # Apply color if core_name is known
     if core_name:
@@ -52,23 +89,21 @@ def plot_box(core_data, title, output_img, logy=False, core_name=None):
         for patch in box['boxes']:
             patch.set_facecolor(color)
 
-    plt.xlabel("UE Count", fontsize=14)
-    plt.ylabel("Processing Time (ms)", fontsize=14)
-    plt.title(title)
-    plt.grid(True)
-    plt.xticks(fontsize=12)
-    plt.yticks(fontsize=12)
+    ax.set_xlabel("UE Count", fontsize=14)
+    ax.set_ylabel("Processing Time (ms)", fontsize=14)
+    ax.set_title(title)
+    ax.grid(True)
+    ax.tick_params(axis="both", labelsize=12)
     if logy:
-        plt.yscale("log")
-        plt.ylim(bottom=min_val)
+        ax.set_yscale("log")
+        ax.set_ylim(bottom=min_val)
     else:
-        plt.ylim(bottom=0)
-    plt.tight_layout()
-    plt.savefig(output_img)
-    plt.close()
+        ax.set_ylim(bottom=0)
+    fig.tight_layout()
+    fig.savefig(output_img)
     print(f"[OK] Box plot saved: {output_img}")
 
-def plot_grouped_box(core_data_dict, op_title, output_img, logy=False):
+def plot_grouped_box(core_data_dict, title, output_img, logy=False):
     all_ue_counts = sorted(set(ue_count for core in core_data_dict.values() for ue_count in core.keys()))
     all_cores = sorted(core_data_dict.keys())
     data = []
@@ -92,42 +127,59 @@ def plot_grouped_box(core_data_dict, op_title, output_img, logy=False):
                 colors.append(color)
                 xtick_labels.append(f"{ue_count}\n{core_label}")
 
-    min_val = min([min(d) for d in data if d]) if logy else 1
-
-    plt.figure(figsize=(14, 7))
-    box = plt.boxplot(
-        data,
-        positions=positions,
-        widths=box_width * 0.9,
-        patch_artist=True,
-        showmeans=True
-    )
+    min_val = min_value(data) if logy else 1
+
+    fig = Figure(figsize=(14, 7))
+    ax = fig.add_subplot()
+    if isinstance(data[0], StreamingStats):
+        box = ax.bxp(
+            [sketch_box_stats(d) for d in data],
+            positions=positions,
+            widths=box_width * 0.9,
+            patch_artist=True,
+            showmeans=True
+        )
+    else:
+        box = ax.boxplot(
+            data,
+            positions=positions,
+            widths=box_width * 0.9,
+            patch_artist=True,
+            showmeans=True
+        )
 
     for patch, color in zip(box['boxes'], colors):
         patch.set_facecolor(color)
 
-    plt.xlabel("UE Count", fontsize=14)
-    plt.ylabel("Processing Time (ms)", fontsize=14)
-    plt.title(f"{op_title} - {ms} ms", fontsize=15)
-    plt.grid(True, axis='y')
+    ax.set_xlabel("UE Count", fontsize=14)
+    ax.set_ylabel("Processing Time (ms)", fontsize=14)
+    ax.set_title(title, fontsize=15)
+    ax.grid(True, axis='y')
 
-    plt.xticks(ticks=positions, labels=xtick_labels, rotation=90, fontsize=10)
-    plt.yticks(fontsize=12)
+    ax.set_xticks(positions, labels=xtick_labels, rotation=90, fontsize=10)
+    ax.tick_params(axis="y", labelsize=12)
     if logy:
-        plt.yscale("log")
-        plt.ylim(bottom=min_val)
+        ax.set_yscale("log")
+        ax.set_ylim(bottom=min_val)
     else:
-        plt.ylim(bottom=0)
+        ax.set_ylim(bottom=0)
 
-    handles = [plt.Line2D([0], [0], color=CORE_COLOR_MAP[core], lw=4) for core in all_cores if core in CORE_COLOR_MAP]
+    handles = [Line2D([0], [0], color=CORE_COLOR_MAP[core], lw=4) for core in all_cores if core in CORE_COLOR_MAP]
     labels = [CORE_NAME_MAP.get(core, core) for core in all_cores if core in CORE_COLOR_MAP]
-    plt.legend(handles, labels, title="Core", loc="upper right")
+    ax.legend(handles, labels, title="Core", loc="upper right")
 
-    plt.tight_layout()
-    plt.savefig(output_img)
-    plt.close()
+    fig.tight_layout()
+    fig.savefig(output_img)
     print(f"[OK] Grouped box plot saved: {output_img}")
 
+def render_box(core_data, title, output_img, output_csv, logy=False, core_name=None):
+    """One render job: the box plot and its stats CSV."""
+    plot_box(core_data, title, output_img, logy=logy, core_name=core_name)
+    if isinstance(next(iter(core_data.values())), StreamingStats):
+        write_sketch_stats_csv(core_data, output_csv)
+    else:
+        write_stats_csv(core_data, output_csv)
+
 def write_stats_csv(core_data, output_path_csv):
     with open(output_path_csv, mode='w', newline='') as file:
         writer = csv.writer(file)
@@ -170,6 +222,47 @@ def write_stats_csv(core_data, output_path_csv):
                 ])
     print(f"[OK] Extended stats saved: {output_path_csv}")
 
+def write_sketch_stats_csv(core_data, output_path_csv):
+    """write_stats_csv() from StreamingStats: quartiles and outlier counts are sketch estimates."""
+    with open(output_path_csv, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow([
+            'Label', 'Count', 'Min', 'Max', 'Mean', 'Median',
+            'Q1', 'Q3', 'IQR',
+            'Lower Whisker', 'Upper Whisker',
+            'Lower Outliers', 'Upper Outliers', 'Total Outliers', 'Outlier %'
+        ])
+        for label, stats in core_data.items():
+            q1 = stats.percentile(25)
+            q3 = stats.percentile(75)
+            iqr = q3 - q1
+            lower_whisker = q1 - 1.5 * iqr
+            upper_whisker = q3 + 1.5 * iqr
+
+            lower_outliers = stats.count_below(lower_whisker)
+            upper_outliers = stats.count_above(upper_whisker)
+            total_outliers = lower_outliers + upper_outliers
+            outlier_pct = (total_outliers / stats.count) * 100
+
+            writer.writerow([
+                label,
+                stats.count,
+                f"{stats.min:.3f}",
+                f"{stats.max:.3f}",
+                f"{stats.mean:.3f}",
+                f"{stats.percentile(50):.3f}",
+                f"{q1:.3f}",
+                f"{q3:.3f}",
+                f"{iqr:.3f}",
+                f"{lower_whisker:.3f}",
+                f"{upper_whisker:.3f}",
+                lower_outliers,
+                upper_outliers,
+                total_outliers,
+                f"{outlier_pct:.2f}"
+            ])
+    print(f"[OK] Extended stats (sketched) saved: {output_path_csv}")
+
 # def write_stats_csv(core_data, output_path_csv):
 #     with open(output_path_csv, mode='w', newline='') as file:
 #         writer = csv.writer(file)
@@ -196,33 +289,51 @@ def write_stats_csv(core_data, output_path_csv):
 #                 ])
 #     print(f"[OK] Stats saved: {output_path_csv}")
 
-def main(input_root, output_root, grouped=False, logy=False):
+def load_csv_groups(input_root, loader=load_grouped_data):
+    """{(core, operation): core_data} from the parsed_csv/<core>/<operation>/*.csv tree."""
+    groups = {}
+    for core_name in os.listdir(input_root):
+        core_path = os.path.join(input_root, core_name)
+        if not os.path.isdir(core_path):
+            continue
+
+        for op_name in os.listdir(core_path):
+            op_path = os.path.join(core_path, op_name)
+            if not os.path.isdir(op_path):
+                continue
+
+            csv_files = [
+                os.path.join(op_path, f)
+                for f in os.listdir(op_path)
+                if f.endswith(".csv")
+            ]
+            if not csv_files:
+                continue
+
+            core_data = loader(csv_files)
+            if not core_data:
+                print(f"[SKIP] No valid data in {op_path}")
+                continue
+            groups[(core_name, op_name)] = core_data
+    return groups
+
+def main(input_root, output_root, ms, grouped=False, logy=False, parquet=False, sketch=False, jobs=1, incremental=False):
     suffix = "_logy" if logy else ""
+    render_jobs = []
+
+    # --sketch streams the values into quantile sketches instead of holding them all
+    if parquet:
+        groups = load_delta_stats(input_root) if sketch else load_delta_groups(input_root)
+    else:
+        groups = load_csv_groups(input_root, loader=load_sketched_data if sketch else load_grouped_data)
 
     if grouped:
         for op_name in OP_NAME_MAP:
-            core_data_dict = {}
-            for core_name in os.listdir(input_root):
-                core_path = os.path.join(input_root, core_name)
-                if not os.path.isdir(core_path):
-                    continue
-
-                op_path = os.path.join(core_path, op_name)
-                if not os.path.isdir(op_path):
-                    continue
-
-                csv_files = [
-                    os.path.join(op_path, f)
-                    for f in os.listdir(op_path)
-                    if f.endswith(".csv")
-                ]
-                if not csv_files:
-                    continue
-
-                core_data = load_grouped_data(csv_files)
-                if core_data:
-                    core_data_dict[core_name] = core_data
-
+            core_data_dict = {
+                core_name: core_data
+                for (core_name, group_op), core_data in groups.items()
+                if group_op == op_name
+            }
             if not core_data_dict:
                 continue
 
@@ -231,43 +342,30 @@ def main(input_root, output_root, grouped=False, logy=False):
             op_title = OP_NAME_MAP.get(op_name, op_name.replace("_", " ").title())
             out_base = f"compare_{op_name}_box{suffix}"
             out_img = os.path.join(out_dir, f"{out_base}.png")
-            plot_grouped_box(core_data_dict, op_title, out_img, logy=logy)
+            render_jobs.append(RenderJob(
+                plot_grouped_box, (core_data_dict, f"{op_title} - {ms} ms", out_img), {"logy": logy}, [out_img]
+            ))
     else:
-        for core_name in os.listdir(input_root):
-            core_path = os.path.join(input_root, core_name)
-            if not os.path.isdir(core_path):
-                continue
+        for (core_name, op_name), core_data in groups.items():
+            out_dir = os.path.join(output_root, core_name)
+            os.makedirs(out_dir, exist_ok=True)
 
-            for op_name in os.listdir(core_path):
-                op_path = os.path.join(core_path, op_name)
-                if not os.path.isdir(op_path):
-                    continue
-
-                csv_files = [
-                    os.path.join(op_path, f)
-                    for f in os.listdir(op_path)
-                    if f.endswith(".csv")
-                ]
-                if not csv_files:
-                    continue
-
-                core_data = load_grouped_data(csv_files)
-                if not core_data:
-                    print(f"[SKIP] No valid data in {op_path}")
-                    continue
-
-                out_dir = os.path.join(output_root, core_name)
-                os.makedirs(out_dir, exist_ok=True)
-
-                core_title = CORE_NAME_MAP.get(core_name.lower(), core_name)
-                op_title = OP_NAME_MAP.get(op_name.lower(), op_name.replace("_", " ").title())
-                title = f"{core_title} - {op_title} - {ms} ms"
-                out_base = f"{core_name}_{op_name}_box{suffix}".lower()
-                out_img = os.path.join(out_dir, f"{out_base}.png")
-                out_csv = os.path.join(out_dir, f"{out_base}.csv")
-
-                plot_box(core_data, title, out_img, logy=logy, core_name=core_name)
-                write_stats_csv(core_data, out_csv)
+            core_title = CORE_NAME_MAP.get(core_name.lower(), core_name)
+            op_title = OP_NAME_MAP.get(op_name.lower(), op_name.replace("_", " ").title())
+            title = f"{core_title} - {op_title} - {ms} ms"
+            out_base = f"{core_name}_{op_name}_box{suffix}".lower()
+            out_img = os.path.join(out_dir, f"{out_base}.png")
+            out_csv = os.path.join(out_dir, f"{out_base}.csv")
+
+            render_jobs.append(RenderJob(
+                render_box, (core_data, title, out_img, out_csv), {"logy": logy, "core_name": core_name},
+                [out_img, out_csv]
+            ))
+
+    # Figures are independent: --jobs renders them in parallel, --incremental skips unchanged ones
+    cache_path = os.path.join(output_root, CACHE_NAME) if incremental else None
+    rendered, skipped, failed = render_all(render_jobs, workers=jobs, cache_path=cache_path)
+    print(f"[OK] {rendered} figure(s) rendered, {skipped} unchanged, {failed} failed")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Auto-plot boxplots from structured delta_ms CSVs")
@@ -275,9 +373,12 @@ if __name__ == "__main__":
     parser.add_argument("--output", "-o", default="./plots", type=str)
     parser.add_argument("--grouped", action="store_true", help="Enable grouped comparison mode across cores")
     parser.add_argument("--logy", action="store_true", help="Enable logarithmic y-axis for box plots")
+    parser.add_argument("--parquet", action="store_true", help="Input is a Parquet dataset written by data_parser.py --parquet")
+    parser.add_argument("--sketch", action="store_true", help="Bounded-memory statistics from streaming quantile sketches")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of figures rendered in parallel")
+    parser.add_argument("--incremental", action="store_true", help="Skip figures whose input data is unchanged since the last render")
     parser.add_argument("--ms", required=True, type=str)
     args = parser.parse_args()
 
-    ms = args.ms
-
-    main(args.input, args.output, grouped=args.grouped, logy=args.logy)
\ No newline at end of file
+    main(args.input, args.output, args.ms, grouped=args.grouped, logy=args.logy, parquet=args.parquet,
+         sketch=args.sketch, jobs=args.jobs, incremental=args.incremental)
\ No newline at end of file
@@ -1,10 +1,16 @@
 import os
 import re
+import sys
 import csv
 import pandas as pd
 import numpy as np
 from scipy.stats import skew, kurtosis
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from render import RenderJob, CACHE_NAME, render_all
+from matplotlib.figure import Figure
+from parquet_store import load_delta_groups, load_delta_stats
+from quantile_sketch import StreamingStats, stats_from_csv_files
 
 CORE_NAME_MAP = {
     "open5gs": "Open5GS",
@@ -20,7 +26,7 @@ OP_NAME_MAP = {
     "pdu_rel": "PDU Session Release",
 }
 
-def plot_cdf(data, label, logx=False):
+def plot_cdf(ax, data, label, logx=False):
     data = np.array(data)
 
     # Filter out non-positive values if using log scale
@@ -32,7 +38,21 @@ def plot_cdf(data, label, logx=False):
 
     sorted_data = np.sort(data)
     yvals = np.arange(1, len(sorted_data) + 1) / float(len(sorted_data))
-    plt.plot(sorted_data, yvals, label=label)
+    ax.plot(sorted_data, yvals, label=label)
+
+def plot_sketch_cdf(ax, stats, label, logx=False):
+    # Empirical CDF at the sketch bucket boundaries
+    values, yvals = stats.sketch.cdf_points()
+    values = np.clip(values, stats.min, stats.max)
+
+    if logx:
+        keep = values > 0
+        values, yvals = values[keep], yvals[keep]
+        if len(values) == 0:
+            print(f"[WARN] All data for {label} is <= 0, skipping.")
+            return
+
+    ax.plot(values, yvals, label=label)
 
 def write_percentiles_csv(core_data, output_path_csv):
     with open(output_path_csv, mode='w', newline='') as file:
@@ -68,6 +88,34 @@ def write_percentiles_csv(core_data, output_path_csv):
             ])
 
 
+def write_sketch_percentiles_csv(core_data, output_path_csv):
+    """write_percentiles_csv() from StreamingStats: percentiles are sketch estimates, the rest is exact."""
+    with open(output_path_csv, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow([
+            'Label', 'Count', 'Min', 'Max', 'Mean', 'StdDev',
+            'p10', 'p25', 'p50', 'p75', 'p90', 'p95', 'p99',
+            'Skewness', 'Kurtosis',
+            '% >100ms', '% >200ms'
+        ])
+        for label, stats in core_data.items():
+            if not stats.count:
+                continue
+            writer.writerow([
+                label,
+                stats.count,
+                f"{stats.min:.3f}",
+                f"{stats.max:.3f}",
+                f"{stats.mean:.3f}",
+                f"{stats.std():.3f}",
+                *(f"{stats.percentile(p):.3f}" for p in (10, 25, 50, 75, 90, 95, 99)),
+                f"{stats.skewness():.3f}",
+                f"{stats.kurtosis():.3f}",
+                f"{stats.fraction_above(100) * 100:.2f}",
+                f"{stats.fraction_above(200) * 100:.2f}",
+            ])
+
+
 # def write_percentiles_csv(core_data, output_path_csv):
 #     percentiles = [50, 90, 99]
 #     with open(output_path_csv, mode='w', newline='') as file:
@@ -80,24 +128,40 @@ def write_percentiles_csv(core_data, output_path_csv):
 #                 p99 = np.percentile(data, 99)
 #                 writer.writerow([label, f"{p50:.3f}", f"{p90:.3f}", f"{p99:.3f}"])
 
-def generate_plot(core_dir, op_dir, csv_files, output_root, logx=False):
-    core = os.path.basename(core_dir)
-    operation = os.path.basename(op_dir)
+def file_label(csv_path):
+    match = re.match(r"^(\d+)", os.path.basename(csv_path))
+    return match.group(1) if match else "X"
 
+def load_csv_data(csv_files):
     core_data = {}
 
     for csv_path in csv_files:
-        filename = os.path.basename(csv_path)
-        match = re.match(r"^(\d+)", filename)
-        label = match.group(1) if match else "X"
+        label = file_label(csv_path)
 
         df = pd.read_csv(csv_path)
         if 'delta_ms' in df.columns:
             core_data.setdefault(label, []).extend(df['delta_ms'].dropna().tolist())
+    return core_data
+
+def load_sketched_data(csv_files):
+    return stats_from_csv_files(csv_files, file_label)
+
+def output_paths(core, operation, output_root, logx=False):
+    suffix = "_logx" if logx else ""
+    out_base = f"{core}_{operation}_cdf{suffix}".lower()
+    out_dir = os.path.join(output_root, core)
+    return os.path.join(out_dir, f"{out_base}.png"), os.path.join(out_dir, f"{out_base}.csv")
+
+def generate_plot(core, operation, core_data, output_root, ms, logx=False):
+    sketched = any(isinstance(data, StreamingStats) for data in core_data.values())
 
     min_positive = float('inf')
     for data in core_data.values():
-        data_array = np.array(data)
+        if sketched:
+            data_array, _ = data.sketch.cdf_points()
+            data_array = np.clip(data_array, data.min, data.max)
+        else:
+            data_array = np.array(data)
         positive_values = data_array[data_array > 0]
         if positive_values.size > 0:
             min_positive = min(min_positive, np.min(positive_values))
@@ -107,46 +171,49 @@ def generate_plot(core_dir, op_dir, csv_files, output_root, logx=False):
 
 
     if not core_data:
-        print(f"[SKIP] No valid data in {op_dir}")
+        print(f"[SKIP] No valid data for {core}/{operation}")
         return
 
     # === Plot ===
-    plt.figure(figsize=(10, 6))
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
     for label, data in sorted(core_data.items()):
-        plot_cdf(data, label, logx=logx)
+        if sketched:
+            plot_sketch_cdf(ax, data, label, logx=logx)
+        else:
+            plot_cdf(ax, data, label, logx=logx)
 
-    plt.xlabel("Processing Time (ms)", fontsize=14)
-    plt.ylabel("Cumulative Probability", fontsize=14)
+    ax.set_xlabel("Processing Time (ms)", fontsize=14)
+    ax.set_ylabel("Cumulative Probability", fontsize=14)
     core_title = CORE_NAME_MAP.get(core.lower(), core.capitalize())
     op_title = OP_NAME_MAP.get(operation.lower(), operation.replace("_", " ").title())
-    plt.title(f"{core_title} - {op_title} - {ms} ms", fontsize=15)
-    plt.legend(title="UEs")
-    plt.grid(True)
-    plt.xticks(fontsize=12)
-    plt.yticks(fontsize=12)
-    plt.xlim(left=0)
+    ax.set_title(f"{core_title} - {op_title} - {ms} ms", fontsize=15)
+    ax.legend(title="UEs")
+    ax.grid(True)
+    ax.tick_params(axis="both", labelsize=12)
+    ax.set_xlim(left=0)
 
     if logx:
-        plt.xscale("log")
-        plt.xlim(left=min_positive)
+        ax.set_xscale("log")
+        ax.set_xlim(left=min_positive)
 
-    plt.tight_layout()
+    fig.tight_layout()
 
     # === Output filenames ===
-    out_dir = os.path.join(output_root, core)
-    os.makedirs(out_dir, exist_ok=True)
+    out_img, out_csv = output_paths(core, operation, output_root, logx=logx)
+    os.makedirs(os.path.dirname(out_img), exist_ok=True)
 
-    suffix = "_logx" if logx else ""
-    out_base = f"{core}_{operation}_cdf{suffix}".lower()
-    out_img = os.path.join(out_dir, f"{out_base}.png")
-    out_csv = os.path.join(out_dir, f"{out_base}.csv")
-
-    plt.savefig(out_img)
-    write_percentiles_csv(core_data, out_csv)
-    plt.close()
+    fig.savefig(out_img)
+    if sketched:
+        write_sketch_percentiles_csv(core_data, out_csv)
+    else:
+        write_percentiles_csv(core_data, out_csv)
     print(f"[OK] Plot saved: {out_img}")
 
-def main(input_root, output_root, logx=False):
+def load_csv_groups(input_root, loader=load_csv_data):
+    """{(core, operation): core_data} from the parsed_csv/<core>/<operation>/*.csv tree."""
+    groups = {}
+
     for core_name in os.listdir(input_root):
         core_path = os.path.join(input_root, core_name)
         if not os.path.isdir(core_path):
@@ -163,7 +230,26 @@ def main(input_root, output_root, logx=False):
                 if f.endswith(".csv")
             ]
             if csv_files:
-                generate_plot(core_path, op_path, csv_files, output_root, logx=logx)
+                groups[(core_name, op_name)] = loader(csv_files)
+    return groups
+
+def main(input_root, output_root, ms, logx=False, parquet=False, sketch=False, jobs=1, incremental=False):
+    # --sketch streams the values into quantile sketches instead of holding them all
+    if parquet:
+        groups = load_delta_stats(input_root) if sketch else load_delta_groups(input_root)
+    else:
+        groups = load_csv_groups(input_root, loader=load_sketched_data if sketch else load_csv_data)
+
+    render_jobs = [
+        RenderJob(generate_plot, (core_name, op_name, core_data, output_root, ms), {"logx": logx},
+                  output_paths(core_name, op_name, output_root, logx=logx))
+        for (core_name, op_name), core_data in groups.items()
+    ]
+
+    # Figures are independent: --jobs renders them in parallel, --incremental skips unchanged ones
+    cache_path = os.path.join(output_root, CACHE_NAME) if incremental else None
+    rendered, skipped, failed = render_all(render_jobs, workers=jobs, cache_path=cache_path)
+    print(f"[OK] {rendered} figure(s) rendered, {skipped} unchanged, {failed} failed")
 
 if __name__ == "__main__":
     import argparse
@@ -171,9 +257,12 @@ if __name__ == "__main__":
     parser.add_argument("--input", "-i", default="./parsed_csv", type=str)
     parser.add_argument("--output", "-o", default="./plots", type=str)
     parser.add_argument("--logx", action="store_true", help="Use logarithmic scale for x-axis")
+    parser.add_argument("--parquet", action="store_true", help="Input is a Parquet dataset written by data_parser.py --parquet")
+    parser.add_argument("--sketch", action="store_true", help="Bounded-memory statistics from streaming quantile sketches")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of figures rendered in parallel")
+    parser.add_argument("--incremental", action="store_true", help="Skip figures whose input data is unchanged since the last render")
     parser.add_argument("--ms", required=True, type=str)
     args = parser.parse_args()
 
-    ms = args.ms
-
-    main(args.input, args.output, logx=args.logx)
+    main(args.input, args.output, args.ms, logx=args.logx, parquet=args.parquet, sketch=args.sketch,
+         jobs=args.jobs, incremental=args.incremental)
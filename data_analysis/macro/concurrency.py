@@ -0,0 +1,205 @@
+import os
+import re
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from run_metadata import find_run
+
+# In-flight procedure concurrency at the AMF, from the per-UE first/release rows
+# written by ngap_id.py. A procedure is in flight from its first to its release
+# message; a sweep over the sorted +1/-1 events gives the exact in-flight count at
+# every event, which is binned into time series and set against each UE's delta_ms.
+
+DEFAULT_BIN_MS = 100
+LEVEL_BINS = 20
+# A core counts as saturated once median latency exceeds this multiple of its low-load median
+SATURATION_FACTOR = 2.0
+
+SUMMARY_FIELDS = [
+    "file", "core", "operation", "ue_count", "mode", "mean_delay", "ues", "completed",
+    "peak_in_flight", "mean_in_flight", "peak_arrival_rate", "peak_completion_rate",
+    "pearson_r", "spearman_r", "baseline_delta_ms", "saturation_in_flight", "saturation_delta_ms",
+]
+
+
+def pair_procedures(df):
+    """Per UE: first 'first' and first 'release' timestamp (release NaN when never seen)."""
+    firsts = df[df["type"] == "first"].groupby("id")["timestamp"].min()
+    releases = df[df["type"] == "release"].groupby("id")["timestamp"].min()
+    ues = pd.DataFrame({"start": firsts, "end": releases.reindex(firsts.index)})
+    ues["delta_ms"] = (ues["end"] - ues["start"]) * 1000
+    return ues
+
+
+def sweep(ues):
+    """
+    Sorted-event sweep. Returns (event_times, in_flight after each event, in_flight
+    seen by each UE at its arrival). Releases sort before arrivals at equal times;
+    UEs without a release stay in flight to the end.
+    """
+    starts = ues["start"].to_numpy(dtype=float)
+    ends = ues["end"].to_numpy(dtype=float)
+    completed = ~np.isnan(ends)
+
+    times = np.concatenate([starts, ends[completed]])
+    steps = np.concatenate([np.ones(len(starts), dtype=np.int64), -np.ones(completed.sum(), dtype=np.int64)])
+    order = np.lexsort((steps, times))
+    in_flight = np.cumsum(steps[order])
+
+    position = np.empty(len(order), dtype=np.int64)
+    position[order] = np.arange(len(order))
+    at_arrival = in_flight[position[:len(starts)]]
+    return times[order], in_flight, at_arrival
+
+
+def time_series(ues, event_times, in_flight, bin_ms=DEFAULT_BIN_MS):
+    """Per time bin: arrival/completion rate (per s), max and time-averaged in-flight count, latency of arrivals."""
+    width = bin_ms / 1000
+    start = event_times[0]
+    bins = max(1, int(np.ceil((event_times[-1] - start) / width)) or 1)
+    edges = start + width * np.arange(bins + 1)
+
+    arrivals = np.histogram(ues["start"].to_numpy(dtype=float), edges)[0]
+    completions = np.histogram(ues["end"].dropna().to_numpy(dtype=float), edges)[0]
+
+    # Level entering each bin, then the max over the events inside it
+    entering = np.concatenate([[0], in_flight])[np.searchsorted(event_times, edges[:-1], side="right")]
+    event_bin = np.minimum(np.searchsorted(edges, event_times, side="right") - 1, bins - 1)
+    peak = pd.Series(in_flight).groupby(event_bin).max().reindex(range(bins)).to_numpy()
+    peak = np.fmax(entering, peak)
+
+    # Time-weighted mean: integrate the step function between consecutive events
+    levels = np.concatenate([[0], in_flight])
+    area_at_events = np.concatenate([[0], np.cumsum(levels[1:-1] * np.diff(event_times))])
+
+    def area(t):
+        idx = np.searchsorted(event_times, t, side="right")
+        before = np.maximum(idx - 1, 0)
+        return np.where(idx > 0, area_at_events[before] + levels[idx] * (t - event_times[before]), 0.0)
+
+    mean = (area(edges[1:]) - area(edges[:-1])) / width
+
+    arrival_bin = np.minimum(np.searchsorted(edges, ues["start"].to_numpy(dtype=float), side="right") - 1, bins - 1)
+    latency = ues["delta_ms"].groupby(arrival_bin).agg(["mean", lambda d: d.quantile(0.95)])
+    latency = latency.reindex(range(bins))
+
+    return pd.DataFrame({
+        "bin_start": np.round(edges[:-1] - start, 6),
+        "arrival_rate": arrivals / width,
+        "completion_rate": completions / width,
+        "in_flight_max": peak.astype(int),
+        "in_flight_mean": mean,
+        "mean_delta_ms": latency.iloc[:, 0].to_numpy(),
+        "p95_delta_ms": latency.iloc[:, 1].to_numpy(),
+    })
+
+
+def latency_by_level(ues, levels=LEVEL_BINS):
+    """Median/p95 delta_ms of completed UEs grouped by the in-flight count they arrived into."""
+    done = ues.dropna(subset=["delta_ms"])
+    if done.empty:
+        return pd.DataFrame(columns=["in_flight_from", "in_flight_to", "ues", "median_delta_ms", "p95_delta_ms"])
+    edges = np.unique(np.quantile(done["in_flight_at_arrival"], np.linspace(0, 1, levels + 1)))
+    group = np.clip(np.searchsorted(edges, done["in_flight_at_arrival"], side="right") - 1, 0, max(len(edges) - 2, 0))
+    grouped = done.groupby(group)
+    return pd.DataFrame({
+        "in_flight_from": grouped["in_flight_at_arrival"].min(),
+        "in_flight_to": grouped["in_flight_at_arrival"].max(),
+        "ues": grouped.size(),
+        "median_delta_ms": grouped["delta_ms"].median(),
+        "p95_delta_ms": grouped["delta_ms"].quantile(0.95),
+    }).reset_index(drop=True)
+
+
+def saturation_point(levels):
+    """(baseline median, first in-flight level whose median exceeds SATURATION_FACTOR x baseline, its median)."""
+    if levels.empty:
+        return None, None, None
+    baseline = levels["median_delta_ms"].iloc[0]
+    saturated = levels[levels["median_delta_ms"] > SATURATION_FACTOR * baseline]
+    if saturated.empty:
+        return baseline, None, None
+    first = saturated.iloc[0]
+    return baseline, int(first["in_flight_from"]), first["median_delta_ms"]
+
+
+def analyse_file(input_path, output_dir, bin_ms=DEFAULT_BIN_MS):
+    df = pd.read_csv(input_path)
+    if not {"timestamp", "type", "id"}.issubset(df.columns):
+        print(f"[SKIP] Missing required columns in: {input_path}")
+        return None
+    ues = pair_procedures(df.dropna(subset=["id", "timestamp"]))
+    if ues.empty:
+        print(f"[SKIP] No procedures in: {input_path}")
+        return None
+
+    event_times, in_flight, at_arrival = sweep(ues)
+    ues["in_flight_at_arrival"] = at_arrival
+    series = time_series(ues, event_times, in_flight, bin_ms=bin_ms)
+    levels = latency_by_level(ues)
+    baseline, saturation_level, saturation_delta = saturation_point(levels)
+
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    os.makedirs(output_dir, exist_ok=True)
+    series.to_csv(os.path.join(output_dir, f"{name}.concurrency.csv"), index=False)
+    levels.to_csv(os.path.join(output_dir, f"{name}.latency_by_in_flight.csv"), index=False)
+
+    done = ues.dropna(subset=["delta_ms"])
+    correlated = len(done) > 1 and done["in_flight_at_arrival"].nunique() > 1
+    run = find_run(os.path.dirname(input_path)) or {}
+    match = re.match(r"(\d+)", name)
+    print(f"[OK] {name}: peak {int(in_flight.max())} in flight, saturation at "
+          f"{saturation_level if saturation_level is not None else '-'}")
+    return {
+        "file": input_path,
+        "core": run.get("core"),
+        "operation": run.get("operation"),
+        "ue_count": run.get("ue_count", int(match.group(1)) if match else None),
+        "mode": run.get("mode"),
+        "mean_delay": run.get("mean_delay"),
+        "ues": len(ues),
+        "completed": len(done),
+        "peak_in_flight": int(in_flight.max()),
+        "mean_in_flight": round(series["in_flight_mean"].mean(), 3),
+        "peak_arrival_rate": series["arrival_rate"].max(),
+        "peak_completion_rate": series["completion_rate"].max(),
+        "pearson_r": round(done["in_flight_at_arrival"].corr(done["delta_ms"]), 4) if correlated else None,
+        "spearman_r": round(done["in_flight_at_arrival"].corr(done["delta_ms"], method="spearman"), 4) if correlated else None,
+        "baseline_delta_ms": round(baseline, 3) if baseline is not None else None,
+        "saturation_in_flight": saturation_level,
+        "saturation_delta_ms": round(saturation_delta, 3) if saturation_delta is not None else None,
+    }
+
+
+def main(input_root, output_root, bin_ms=DEFAULT_BIN_MS):
+    summary = []
+    for dirpath, _, filenames in os.walk(input_root):
+        for file in sorted(filenames):
+            if not file.endswith(".csv"):
+                continue
+            input_path = os.path.join(dirpath, file)
+            output_dir = os.path.join(output_root, os.path.relpath(dirpath, input_root))
+            row = analyse_file(input_path, output_dir, bin_ms=bin_ms)
+            if row:
+                summary.append(row)
+
+    if summary:
+        os.makedirs(output_root, exist_ok=True)
+        summary_path = os.path.join(output_root, "concurrency_summary.csv")
+        pd.DataFrame(summary, columns=SUMMARY_FIELDS).to_csv(summary_path, index=False)
+        print(f"✅ {len(summary)} run(s) summarised in {summary_path}")
+    else:
+        print("[WARN] No NGAP procedure CSVs found")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-flight NGAP procedure concurrency from ngap_id.py output")
+    parser.add_argument("--input", "-i", required=True, type=str, help="Directory with ngap_id.py CSVs (recursive)")
+    parser.add_argument("--output", "-o", default="./concurrency", type=str, help="Output root directory")
+    parser.add_argument("--bin-ms", type=float, default=DEFAULT_BIN_MS, help="Width of the time series bins")
+    args = parser.parse_args()
+
+    main(args.input, args.output, bin_ms=args.bin_ms)
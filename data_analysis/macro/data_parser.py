@@ -1,19 +1,30 @@
 import os
 import re
+import sys
 import pandas as pd
 import argparse
 from collections import defaultdict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from run_metadata import find_run
+
 # === CLI Arguments ===
 parser = argparse.ArgumentParser(description="Parse CSVs by test type, UE count, and 5GC type from folder name")
 parser.add_argument("--input", "-i", required=True, type=str, help="Input directory (recursive)")
 parser.add_argument("--output", "-o", default="./parsed_csv", type=str, help="Output root directory")
+parser.add_argument("--parquet", type=str, help="Also write typed results to this Parquet dataset (needs pyarrow)")
+parser.add_argument("--catalog", type=str, help="Catalog (catalog.py) of the input tree, used instead of walking it")
 args = parser.parse_args()
 
 input_root = args.input
 output_root = args.output
 os.makedirs(output_root, exist_ok=True)
 
+if args.parquet:
+    from parquet_store import require_pyarrow, write_results
+    require_pyarrow()
+parquet_rows = []
+
 # === Extract test type from filename ===
 def detect_test_type(filename: str) -> str:
     name = filename.lower()
@@ -43,47 +54,120 @@ def extract_core_type(parent_dir_name: str) -> str:
 # === Collect CSVs into groups by (core, test_type, ue_count) ===
 csv_groups = defaultdict(list)
 
-for dirpath, _, filenames in os.walk(input_root):
-    parent_dir_name = os.path.basename(dirpath)
-    core_type = extract_core_type(parent_dir_name)
+if args.catalog:
+    from catalog import Catalog
+    catalog = Catalog(args.catalog)
+    for entry in catalog.files(ext=".csv", kind="table"):
+        # Core comes from the run, the UE count too when the file name lacks it
+        test_type = detect_test_type(entry["name"])
+        ue_count = extract_ue_count(entry["name"])
+        if ue_count == "X":
+            ue_count = str(entry["ue_count"])
+        if test_type:
+            csv_groups[(entry["core"], test_type, ue_count)].append(entry["path"])
+    catalog.close()
+else:
+    for dirpath, _, filenames in os.walk(input_root):
+        parent_dir_name = os.path.basename(dirpath)
+        core_type = extract_core_type(parent_dir_name)
+
+        for file in filenames:
+            if file.endswith(".csv"):
+                test_type = detect_test_type(file)
+                ue_count = extract_ue_count(file)
+                if test_type and core_type:
+                    key = (core_type, test_type, ue_count)
+                    csv_groups[key].append(os.path.join(dirpath, file))
 
-    for file in filenames:
-        if file.endswith(".csv"):
-            test_type = detect_test_type(file)
-            ue_count = extract_ue_count(file)
-            if test_type and core_type:
-                key = (core_type, test_type, ue_count)
-                csv_groups[key].append(os.path.join(dirpath, file))
+# === Pair first/release rows of every UE in one pivot ===
+def pair_first_release(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (file, id): the first 'first' and the first 'release' timestamp
+    of that UE in that file, and whether both were seen.
+    """
+    rows = df[df['type'].isin(['first', 'release']) & df['id'].notna()]
+    rows = rows.drop_duplicates(subset=['file', 'id', 'type'], keep='first')
+    pivot = rows.pivot(index=['file', 'id'], columns='type', values='timestamp')
+    pivot = pivot.reindex(columns=['first', 'release'])
+    seen = rows.pivot_table(index=['file', 'id'], columns='type', values='timestamp', aggfunc='size', fill_value=0)
+    seen = seen.reindex(index=pivot.index, columns=['first', 'release'], fill_value=0)
+    pivot['complete'] = (seen['first'] > 0) & (seen['release'] > 0)
+    return pivot
 
 # === Process each group ===
+incomplete_report = []
+
 for (core_type, test_type, ue_count), file_list in csv_groups.items():
-    results = []
+    frames = []
+    ue_ids = []  # per file: every id present, so UEs with neither row still count as incomplete
 
-    for file_path in file_list:
+    for file_index, file_path in enumerate(file_list):
         df = pd.read_csv(file_path)
-
         if {'timestamp', 'type', 'id'}.issubset(df.columns):
-            grouped = df.groupby('id')
-            for ue_id, group in grouped:
-                first_row = group[group['type'] == 'first']
-                release_row = group[group['type'] == 'release']
-
-                if not first_row.empty and not release_row.empty:
-                    delta = float(release_row['timestamp'].values[0]) - float(first_row['timestamp'].values[0])
-                    results.append({'ran_ue_ngap_id': ue_id, 'delta_ms': delta * 1000})
-                else:
-                    print(f"[SKIP] {ue_id}: missing first or release row (file: {os.path.basename(file_path)})")
+            frames.append(df[['timestamp', 'type', 'id']].assign(file=file_index))
+            ue_ids.append(df['id'].dropna().nunique())
         else:
             print(f"[ERROR] Missing required columns in: {file_path}")
+            ue_ids.append(None)
+
+    results = pd.DataFrame(columns=['ran_ue_ngap_id', 'delta_ms'])
+    if frames:
+        pairs = pair_first_release(pd.concat(frames, ignore_index=True))
+        complete = pairs[pairs['complete']].reset_index()
+        complete['delta_ms'] = (complete['release'].astype(float) - complete['first'].astype(float)) * 1000
+        results = complete.rename(columns={'id': 'ran_ue_ngap_id'})[['ran_ue_ngap_id', 'delta_ms']]
+
+        complete_per_file = complete.groupby('file').size()
+        for file_index, file_path in enumerate(file_list):
+            if ue_ids[file_index] is None:
+                continue
+            valid = int(complete_per_file.get(file_index, 0))
+            incomplete = ue_ids[file_index] - valid
+            incomplete_report.append({
+                'core': core_type,
+                'operation': test_type,
+                'ue_count': ue_count,
+                'file': file_path,
+                'ues': ue_ids[file_index],
+                'complete': valid,
+                'incomplete': incomplete,
+            })
+            if incomplete:
+                print(f"[SKIP] {incomplete} UE(s) missing first or release row (file: {os.path.basename(file_path)})")
+
+        if args.parquet and not complete.empty:
+            runs = [find_run(os.path.dirname(file_path)) or {} for file_path in file_list]
+            run_ue_count = pd.Series([run.get('ue_count') for run in runs])
+            parquet_rows.extend(pd.DataFrame({
+                'core': core_type,
+                'operation': test_type,
+                'ue_count': int(ue_count) if ue_count.isdigit() else run_ue_count[complete['file']].values,
+                'mode': [runs[i].get('mode') for i in complete['file']],
+                'mean_delay': [runs[i].get('mean_delay') for i in complete['file']],
+                'ue_id': complete['id'].astype('int64'),
+                'first_timestamp': complete['first'].astype(float),
+                'last_timestamp': complete['release'].astype(float),
+                'delta_ms': complete['delta_ms'],
+            }).to_dict('records'))
 
     # === Save output ===
-    if results:
+    if not results.empty:
         output_dir = os.path.join(output_root, core_type, test_type)
         os.makedirs(output_dir, exist_ok=True)
         output_path = os.path.join(output_dir, f"{ue_count}.{test_type}.csv")
-        pd.DataFrame(results).to_csv(output_path, index=False)
+        results.to_csv(output_path, index=False)
         print(f"[OK] Saved: {output_path}")
     else:
         print(f"[WARN] No valid entries for {test_type} ({ue_count}) [{core_type}]")
 
+# === Per-file completeness, one row per input CSV ===
+if incomplete_report:
+    report_path = os.path.join(output_root, "incomplete_ues.csv")
+    pd.DataFrame(incomplete_report).to_csv(report_path, index=False)
+    print(f"[OK] Incomplete UE report: {report_path}")
+
+if args.parquet:
+    count = write_results(parquet_rows, args.parquet)
+    print(f"[OK] Parquet: {count} rows → {args.parquet}")
+
 print("✅ All done.")
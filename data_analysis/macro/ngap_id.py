@@ -1,12 +1,16 @@
 import os
-import xml.etree.ElementTree as ET
-from collections import defaultdict
+import sys
 import csv
 import argparse
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from ngap_reader import read_ngap_records
+from ngap_pairing import MACRO_PROCEDURES, pair_procedures
+
 parser = argparse.ArgumentParser(description="Parse messages using specified NF pattern set")
 parser.add_argument("--input", "-i", type=str, help="Input directory")
 parser.add_argument("--output", "-o", type=str, help="Input directory")
+parser.add_argument("--pcap", action="store_true", help="Read .pcap/.pcapng captures directly instead of converted PDML/TSV")
 args = parser.parse_args()
 
 # Define root paths
@@ -28,16 +32,6 @@ FILENAME_TEST_MAP = {
     "pdu_rel": "pdu_rel"
 }
 
-# NGAP procedure mapping
-PROCEDURE_CODE_MAP = {
-    "ue_reg_pdu":    {"first": "15", "release": "29"},    # ue_reg_pdu
-    "ue_reg":    {"first": "15", "release": "14"},
-    # "ue_dereg_pdu":  {"first": "46", "release": "41"},
-    "ue_dereg":  {"first": "46", "release": "41"},
-    "pdu_est":   {"first": "46", "release": "29"},
-    "pdu_rel":   {"first": "46", "release": "28"},
-}
-
 def determine_test_type(filename: str) -> str:
     for keyword, test in FILENAME_TEST_MAP.items():
         if keyword in filename:
@@ -46,67 +40,8 @@ def determine_test_type(filename: str) -> str:
 
 
 def process_pdml_file(input_path: str, test_type: str, output_csv: str):
-    tree = ET.parse(input_path)
-    root = tree.getroot()
-    output = []
-
-    for packet in root.findall("packet"):
-        frame_number = None
-        timestamp = None
-        direction = None
-        current_ran_ids = []
-        current_procedure_codes = []
-        current_pdu_types = []
-
-        for proto in packet.findall("proto"):
-            if proto.get("name") == "frame":
-                for field in proto.iter("field"):
-                    if field.get("name") == "frame.number":
-                        frame_number = int(field.get("show"))
-                    elif field.get("name") == "frame.time_relative":
-                        timestamp = field.get("show")
-            elif proto.get("name") == "sll":
-                for field in proto.iter("field"):
-                    if field.get("name") == "sll.pkttype":
-                        val = field.get("show")
-                        direction = "recv" if val == "0" else "send" if val == "4" else None
-            elif proto.get("name") == "ngap":
-                for field in proto.iter("field"):
-                    if field.get("name") == "ngap.RAN_UE_NGAP_ID":
-                        current_ran_ids.append(field.get("show"))
-                    elif field.get("name") == "ngap.procedureCode":
-                        current_procedure_codes.append(field.get("show"))
-                    elif field.get("name") == "ngap.initiatingMessage_element":
-                        current_pdu_types.append("initiating")
-                    elif field.get("name") == "ngap.successfulOutcome_element":
-                        current_pdu_types.append("successful")
-
-        for idx, ran_id in enumerate(current_ran_ids):
-            proc_code = current_procedure_codes[idx] if idx < len(current_procedure_codes) else current_procedure_codes[-1]
-            pdu_type = current_pdu_types[idx] if idx < len(current_pdu_types) else current_pdu_types[-1]
-            output.append((ran_id, frame_number, timestamp, proc_code, pdu_type, direction))
-
-    packets_by_id = defaultdict(list)
-    for ran_id, frame_number, timestamp, procedure_code, pdu_type, direction in output:
-        packets_by_id[ran_id].append((frame_number, timestamp, procedure_code, pdu_type, direction))
-
-    procedure_pair = PROCEDURE_CODE_MAP[test_type]
-    first_code = procedure_pair["first"]
-    release_code = procedure_pair["release"]
-    results = []
-
-    for ran_id, packet_list in packets_by_id.items():
-        first = None
-        release = None
-        for frame_number, timestamp, procedure_code, pdu_type, direction in sorted(packet_list):
-            if procedure_code == first_code and pdu_type == "initiating" and not first:
-                first = (frame_number, timestamp, direction)
-            elif procedure_code == release_code and pdu_type in ("initiating", "successful"):
-                release = (frame_number, timestamp, direction)
-        if first:
-            results.append({"id": ran_id, "frame_number": first[0], "timestamp": first[1], "type": "first", "procedure_code": first_code, "direction": first[2]})
-        if release:
-            results.append({"id": ran_id, "frame_number": release[0], "timestamp": release[1], "type": "release", "procedure_code": release_code, "direction": release[2]})
+    procedures = {test_type: MACRO_PROCEDURES[test_type]}
+    results = pair_procedures(read_ngap_records(input_path), procedures)[test_type]
 
     os.makedirs(os.path.dirname(output_csv), exist_ok=True)
     with open(output_csv, "w", newline="") as csvfile:
@@ -116,9 +51,11 @@ def process_pdml_file(input_path: str, test_type: str, output_csv: str):
 
 
 # === WALK FILES ===
+input_extensions = (".pcap", ".pcapng") if args.pcap else (".pdml", ".tsv")
+
 for dirpath, _, filenames in os.walk(input_root):
     for file in filenames:
-        if file.endswith(".pdml"):
+        if file.endswith(input_extensions):
             pdml_path = os.path.join(dirpath, file)
             rel_path = os.path.relpath(dirpath, input_root)
             output_dir = os.path.join(output_root, rel_path)
@@ -3,8 +3,11 @@ import matplotlib.pyplot as plt
 import argparse
 import numpy as np
 import os
+import sys
 from matplotlib.lines import Line2D
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
 def parse_title_and_output_from_filename(filepath, output_root):
     base = os.path.basename(filepath)
     name, _ = os.path.splitext(base)
@@ -21,6 +24,9 @@ def parse_title_and_output_from_filename(filepath, output_root):
     interval = parts[3]
     action_key = '_'.join(parts[4:6])  # e.g. ue_reg_pdu
 
+    return build_title_and_output(name, num_ues, framework, interval, action_key, output_root)
+
+def build_title_and_output(name, num_ues, framework, interval, action_key, output_root):
     # Friendly label
     action_map = {
         'ue_reg': "UE Registration",
@@ -37,7 +43,7 @@ def parse_title_and_output_from_filename(filepath, output_root):
     title = f"{framework} - {action_label} - {num_ues} UEs - {interval_ms} ms"
 
     # Determine output path
-    core = parts[1].lower()
+    core = framework.lower()
     action_dir = action_key.lower()
 
     output_dir = os.path.join(output_root, core, action_dir)
@@ -46,6 +52,14 @@ def parse_title_and_output_from_filename(filepath, output_root):
 
     return title, output_file
 
+def title_and_output_from_catalog(entry, output_root):
+    # Run metadata from the catalog; files outside a named run fall back to the file name
+    if entry["run_path"] is None or entry["mean_delay"] is None:
+        return parse_title_and_output_from_filename(entry["path"], output_root)
+    name, _ = os.path.splitext(entry["name"])
+    return build_title_and_output(name, entry["ue_count"], entry["core"].capitalize(),
+                                  entry["mean_delay"], entry["operation"], output_root)
+
 def plot_csv(input_file, output_file, title):
     df = pd.read_csv(input_file)
     df_sorted = df.sort_values(by='timestamp').reset_index(drop=True)
@@ -97,21 +111,141 @@ def plot_csv(input_file, output_file, title):
     plt.close()
     print(f"Saved plot to: {output_file}")
 
-def process_directory(input_dir, output_dir):
+# Above this many events the raw dot plot is replaced by per-bucket aggregates
+MAX_RAW_POINTS = 5000
+DEFAULT_BINS = 200
+# Latency percentiles are taken over this many buckets on either side
+LATENCY_WINDOW = 2
+
+def bin_events(df, bins=DEFAULT_BINS, window=LATENCY_WINDOW):
+    """
+    Aggregate request/response events into equal-width time buckets: first/release
+    counts, UEs in flight (first seen, no release yet) and rolling p50/p95/p99
+    latency of the UEs completing around each bucket.
+    """
+    timestamps = df['timestamp'].to_numpy(dtype=float)
+    types = df['type'].fillna('').to_numpy()
+    start, end = np.nanmin(timestamps), np.nanmax(timestamps)
+    if end <= start:
+        end = start + 1e-3
+    edges = np.linspace(start, end, bins + 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    aggregates = {
+        'edges': edges,
+        'centers': centers,
+        'first': np.histogram(timestamps[types == 'first'], edges)[0],
+        'release': np.histogram(timestamps[types == 'release'], edges)[0],
+        'other': np.histogram(timestamps[(types != 'first') & (types != 'release')], edges)[0],
+    }
+    if 'id' not in df.columns:
+        return aggregates
+
+    firsts = df[df['type'] == 'first'].groupby('id')['timestamp'].min()
+    releases = df[df['type'] == 'release'].groupby('id')['timestamp'].min()
+
+    # In flight at t: started at or before t, not yet released (never released = until the end)
+    starts = np.sort(firsts.to_numpy(dtype=float))
+    stops = np.sort(releases.reindex(firsts.index).fillna(np.inf).to_numpy(dtype=float))
+    aggregates['in_flight'] = np.searchsorted(starts, centers, side='right') - np.searchsorted(stops, centers, side='right')
+
+    paired = pd.concat([firsts, releases], axis=1, keys=['first', 'release'], join='inner')
+    completed = paired['release'].to_numpy(dtype=float)
+    latency_ms = (completed - paired['first'].to_numpy(dtype=float)) * 1000
+    order = np.argsort(completed)
+    completed, latency_ms = completed[order], latency_ms[order]
+
+    lo = np.searchsorted(completed, edges[np.clip(np.arange(bins) - window, 0, bins)], side='left')
+    hi = np.searchsorted(completed, edges[np.clip(np.arange(bins) + window + 1, 0, bins)], side='right')
+    percentiles = np.full((bins, 3), np.nan)
+    for i in np.flatnonzero(hi > lo):
+        percentiles[i] = np.percentile(latency_ms[lo[i]:hi[i]], [50, 95, 99])
+    aggregates['latency'] = percentiles
+    return aggregates
+
+def plot_lod(df, output_file, title, bins=DEFAULT_BINS):
+    agg = bin_events(df, bins=bins)
+    centers = agg['centers']
+    width = agg['edges'][1] - agg['edges'][0]
+    panels = 3 if 'latency' in agg else 1
+
+    fig, axes = plt.subplots(panels, 1, figsize=(12, 2.5 + 2 * panels), sharex=True, squeeze=False)
+    axes = axes[:, 0]
+
+    ax = axes[0]
+    ax.step(centers, agg['first'], where='mid', color='green', label='Request')
+    ax.step(centers, agg['release'], where='mid', color='red', label='Response')
+    if agg['other'].any():
+        ax.step(centers, agg['other'], where='mid', color='purple', label='Other')
+    ax.set_ylabel(f'Events / {width * 1000:.0f} ms')
+    ax.set_title(title)
+    ax.legend(loc='upper right', frameon=False)
+    ax.grid(axis='x', linestyle='--', alpha=0.5)
+
+    if panels == 3:
+        ax = axes[1]
+        ax.fill_between(centers, agg['in_flight'], step='mid', color='gray', alpha=0.5)
+        ax.set_ylabel('UEs in flight')
+        ax.grid(axis='x', linestyle='--', alpha=0.5)
+
+        ax = axes[2]
+        for column, label, color in ((0, 'p50', 'tab:blue'), (1, 'p95', 'tab:orange'), (2, 'p99', 'tab:red')):
+            ax.plot(centers, agg['latency'][:, column], color=color, linewidth=1, label=label)
+        ax.set_ylabel('Latency (ms)')
+        ax.legend(loc='upper right', frameon=False, ncol=3)
+        ax.grid(axis='x', linestyle='--', alpha=0.5)
+
+    axes[-1].set_xlabel('Timestamp (s)')
+    fig.tight_layout()
+    fig.savefig(output_file, bbox_inches='tight')
+    plt.close(fig)
+    print(f"Saved plot to: {output_file}")
+
+def plot_events(input_file, output_file, title, lod='auto', max_points=MAX_RAW_POINTS, bins=DEFAULT_BINS):
+    """Raw dot plot for small runs, bucketed aggregates for large ones (or as forced by lod)."""
+    if lod == 'never':
+        return plot_csv(input_file, output_file, title)
+    df = pd.read_csv(input_file)
+    if lod == 'auto' and len(df) <= max_points:
+        return plot_csv(input_file, output_file, title)
+    plot_lod(df.dropna(subset=['timestamp']), output_file, title, bins=bins)
+
+def process_directory(input_dir, output_dir, **plot_options):
     for root, _, files in os.walk(input_dir):
         for file in files:
             if file.endswith('.csv'):
                 input_path = os.path.join(root, file)
                 title, output_path = parse_title_and_output_from_filename(input_path, output_dir)
                 try:
-                    plot_csv(input_path, output_path, title)
+                    plot_events(input_path, output_path, title, **plot_options)
                 except Exception as e:
                     print(f"Error processing {input_path}: {e}")
 
+def process_catalog(db_path, output_dir, **plot_options):
+    from catalog import Catalog
+    catalog = Catalog(db_path)
+    entries = catalog.files(in_run=False, ext='.csv', kind='table')
+    catalog.close()
+    for entry in entries:
+        title, output_path = title_and_output_from_catalog(entry, output_dir)
+        try:
+            plot_events(entry["path"], output_path, title, **plot_options)
+        except Exception as e:
+            print(f"Error processing {entry['path']}: {e}")
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Batch process CSVs into time series dot plots.')
     parser.add_argument('--input', '-i', default='./input', help='Input directory with CSV files')
     parser.add_argument('--output', '-o', default='./output', help='Output directory for PNG plots')
+    parser.add_argument('--catalog', help='Catalog (catalog.py) of the input tree, used instead of walking it')
+    parser.add_argument('--lod', choices=['auto', 'always', 'never'], default='auto',
+                        help='Plot per-bucket aggregates instead of every event (auto: above --max-points events)')
+    parser.add_argument('--max-points', type=int, default=MAX_RAW_POINTS, help='Largest run still drawn event by event')
+    parser.add_argument('--bins', type=int, default=DEFAULT_BINS, help='Number of time buckets in aggregate plots')
 
     args = parser.parse_args()
-    process_directory(args.input, args.output)
+    plot_options = {'lod': args.lod, 'max_points': args.max_points, 'bins': args.bins}
+    if args.catalog:
+        process_catalog(args.catalog, args.output, **plot_options)
+    else:
+        process_directory(args.input, args.output, **plot_options)
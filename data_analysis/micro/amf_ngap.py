@@ -0,0 +1,63 @@
+import csv
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from ngap_reader import read_ngap_records
+from ngap_pairing import AMF_PROCEDURES, pair_procedures
+
+# UE Registration, UE Registration with PDU, UE Deregistration,
+# PDU Session Establishment, PDU Session Release
+#   AMF
+
+FIELDNAMES = ["id", "frame_number", "timestamp", "type", "direction"]
+
+
+def run(input_path, output_csv, nf=None, core=None, operation="all"):
+    if operation == "all":
+        procedures = AMF_PROCEDURES
+    elif operation in AMF_PROCEDURES:
+        procedures = {operation: AMF_PROCEDURES[operation]}
+    else:
+        raise ValueError(f"Unsupported operation: {operation}")
+
+    # === Pair all requested procedures in a single pass ===
+    results = pair_procedures(read_ngap_records(input_path), procedures)
+
+    # === Write to CSV ===
+    os.makedirs(os.path.dirname(output_csv) or ".", exist_ok=True)
+
+    total = 0
+    for name, rows in results.items():
+        if operation == "all":
+            target = f"{os.path.splitext(output_csv)[0]}.{name}.csv"
+        else:
+            target = output_csv
+
+        with open(target, "w", newline="") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                # AMF captures carry no SLL header: direction is implied by the message
+                if not row["direction"]:
+                    row["direction"] = "recv" if row["type"] == "first" else "send"
+                writer.writerow(row)
+        total += len(rows)
+
+    print("✅ Done!")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pair first/release NGAP messages per RAN UE NGAP ID")
+    parser.add_argument("--name", "-n", required=True, type=str)
+    parser.add_argument("--input", "-i", type=str, help="Input directory")
+    parser.add_argument("--output", "-o", default=".csv", type=str)
+    parser.add_argument("--operation", required=True, choices=list(AMF_PROCEDURES) + ["all"], help="Procedure to pair, or all of them in one pass")
+    parser.add_argument("--pattern", "-p", type=str)
+    parser.add_argument("--core", "-c", type=str)
+    args = parser.parse_args()
+
+    input_file = args.name  # 100.amf.ue_reg.pdml
+    run(os.path.join(args.input, input_file), f"{args.output}/{input_file}.csv", args.pattern, args.core, args.operation)
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import argparse
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sbi_reader import read_tcp_payloads, decode_payload
+from pattern_matcher import PatternMatcher
+
+# Micro-benchmark: payloads/sec of the sequential regex loop versus PatternMatcher
+# on the decoded payloads of one capture (tshark JSON or raw .pcap/.pcapng)
+
+
+def match_sequential(decoded_text, patterns):
+    for idx, pattern in enumerate(patterns):
+        if pattern.search(decoded_text):
+            return idx
+    return None
+
+
+def bench(label, fn, payloads, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(text) for text in payloads]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    rate = len(payloads) / best if best else float("inf")
+    print(f"   • {label:<12} {best * 1000:10.1f} ms   {rate:12,.0f} payloads/s")
+    return results, best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SBI pattern matching on a capture")
+    parser.add_argument("--input", "-i", required=True, type=str, help="tshark JSON export or raw capture")
+    parser.add_argument("--script", "-s", default="ue_reg_json", type=str, help="Micro script providing pattern_matrix")
+    parser.add_argument("--pattern", required=True, type=str, help="Network Function, e.g. udm")
+    parser.add_argument("--core", required=True, type=str, help="Core name: free5gc, open5gs")
+    parser.add_argument("--repeat", "-r", default=5, type=int, help="Runs per matcher, best one is reported")
+    args = parser.parse_args()
+
+    patterns, _ = importlib.import_module(args.script).pattern_matrix[(args.pattern, args.core)]
+    payloads = [decode_payload(payload) for _, _, _, payload in read_tcp_payloads(args.input)]
+    matcher = PatternMatcher(patterns)
+
+    print(f"🔍 {len(payloads)} payloads, {len(patterns)} patterns ({args.script}: {args.pattern}/{args.core})")
+    expected, before = bench("sequential", lambda text: match_sequential(text, patterns), payloads, args.repeat)
+    actual, after = bench("compiled", matcher.match, payloads, args.repeat)
+
+    if actual != expected:
+        mismatches = sum(1 for a, b in zip(actual, expected) if a != b)
+        print(f"[ERROR] {mismatches} payload(s) matched a different pattern")
+        sys.exit(1)
+    print(f"✅ Identical matches, {before / after:.1f}x speed-up" if after else "✅ Identical matches")
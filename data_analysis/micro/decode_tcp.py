@@ -1,5 +1,8 @@
-import json
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sbi_reader import iter_json_array
 
 path = "/mnt/c/Dev/master/pcap_captures/open5gs_19.05.2025_captures/100_linear_pdu_rel_open5gs_2025.05.19_12.58/open5gs_udm.json"
 output_file = os.path.basename(path) + ".decoded.txt"
@@ -20,11 +23,8 @@ def decode_payload(hex_str):
 # Ensure output directory exists
 os.makedirs("tmp", exist_ok=True)
 
-with open(path, "r") as f:
-    packets = json.load(f)
-
 with open("tmp/" + output_file, "w", encoding="utf-8") as out:
-    for pkt in packets:
+    for pkt in iter_json_array(path):
         layers = pkt.get("_source", {}).get("layers", {})
         frame_number = layers.get("frame", {}).get("frame.number", "unknown")
         tcp = layers.get("tcp", {})
@@ -1,69 +1,77 @@
 import os
 import re
+import sys
 import argparse
-import subprocess
+import importlib
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from catalog import Catalog
+
+# One script pairs the NGAP procedures of every operation
+NGAP_SCRIPT = "amf_ngap.py"
 
 # Configure available analysis scripts
 SCRIPT_MAP = {
     "open5gs": {
         "ue_reg": {
-            "amf": {".pdml": ["ue_reg_ngap.py"]},
+            "amf": {".pdml": [NGAP_SCRIPT], ".tsv": [NGAP_SCRIPT]},
             "ausf": {".json": ["ue_reg_json.py"]},
             "pcf": {".json": ["ue_reg_json.py"]},
             "udm": {".json": ["ue_reg_json.py"]},
         },
         "ue_reg_pdu": {
-            "amf": {".pdml": ["ue_reg_pdu_ngap.py"]},
+            "amf": {".pdml": [NGAP_SCRIPT], ".tsv": [NGAP_SCRIPT]},
             "ausf": {".json": ["ue_reg_pdu_json.py"]},
             "pcf": {".json": ["ue_reg_pdu_json.py"]},
             "udm": {".json": ["ue_reg_pdu_json.py"]},
             "smf": {".json": ["ue_reg_pdu_json.py"]},
         },
         "ue_dereg": {
-            "amf": {".pdml": ["ue_dereg_ngap.py"]},
+            "amf": {".pdml": [NGAP_SCRIPT], ".tsv": [NGAP_SCRIPT]},
             "udm": {".json": ["ue_dereg_pdu.py"]},
             # "udm": {".json": ["ue_dereg.py"]},
         },
         "pdu_est": {
-            "amf": {".pdml": ["pdu_est_ngap.py"]},
+            "amf": {".pdml": [NGAP_SCRIPT], ".tsv": [NGAP_SCRIPT]},
             "pcf": {".json": ["pdu_est_json.py"]},
             "smf": {".json": ["pdu_est_json.py"]},
             "udm": {".json": ["pdu_est_json.py"]},
         },
         "pdu_rel": {
-            "amf": {".pdml": ["pdu_rel_ngap.py"]},
+            "amf": {".pdml": [NGAP_SCRIPT], ".tsv": [NGAP_SCRIPT]},
             "pcf": {".json": ["pdu_rel_json.py"]},
             "smf": {".json": ["pdu_rel_json.py"]},
         },
     },
     "free5gc": {
         "ue_reg": {
-            "amf": {".pdml": ["ue_reg_ngap.py"]},
+            "amf": {".pdml": [NGAP_SCRIPT], ".tsv": [NGAP_SCRIPT]},
             "ausf": {".json": ["ue_reg_json.py"]},
             "pcf": {".json": ["ue_reg_json.py"]},
             "udm": {".json": ["ue_reg_json.py"]},
         },
         "ue_reg_pdu": {
-            "amf": {".pdml": ["ue_reg_pdu_ngap.py"]},
+            "amf": {".pdml": [NGAP_SCRIPT], ".tsv": [NGAP_SCRIPT]},
             "ausf": {".json": ["ue_reg_pdu_json.py"]},
             "pcf": {".json": ["ue_reg_pdu_json.py"]},
             "udm": {".json": ["ue_reg_pdu_json.py"]},
             "smf": {".json": ["ue_reg_pdu_json.py"]},
         },
         "ue_dereg": {
-            "amf": {".pdml": ["ue_dereg_ngap.py"]},
+            "amf": {".pdml": [NGAP_SCRIPT], ".tsv": [NGAP_SCRIPT]},
             "udm": {".json": ["ue_dereg_pdu.py"]},
             # "udm": {".json": ["ue_dereg.py"]},
         },
         "pdu_est": {
-            "amf": {".pdml": ["pdu_est_ngap.py"]},
+            "amf": {".pdml": [NGAP_SCRIPT], ".tsv": [NGAP_SCRIPT]},
             "pcf": {".json": ["pdu_est_json.py"]},
             "smf": {".json": ["pdu_est_json.py"]},
             "udm": {".json": ["pdu_est_json.py"]},
         },
         "pdu_rel": {
-            "amf": {".pdml": ["pdu_rel_ngap.py"]},
+            "amf": {".pdml": [NGAP_SCRIPT], ".tsv": [NGAP_SCRIPT]},
             "pcf": {".json": ["pdu_rel_json.py"]},
             "smf": {".json": ["pdu_rel_json.py"]},
             "udm": {".json": ["pdu_rel_json.py"]},
@@ -88,11 +96,31 @@ SCRIPT_MAP = {
     # },
 }
 
-def detect_and_run(base_dir, output_dir):
-    base_path = Path(base_dir)
+# Raw captures are read natively by both the SBI and the NGAP scripts
+RAW_CAPTURE_EXTS = {".pcap", ".pcapng"}
+
+# HTTP/2 stream records and per-UE transactions, only available from raw captures of SBI NFs
+STREAMS_SCRIPT = "sbi_streams.py"
+TRANSACTIONS_SCRIPT = "sbi_transactions.py"
+
+
+def run_analysis(script, input_path, output_csv, nf, core, operation):
+    """
+    Import the analysis script and call its run() in this process.
+    Returns (row_count, error_message); row_count is None on failure.
+    """
+    try:
+        module = importlib.import_module(Path(script).stem)
+        return module.run(input_path, output_csv, nf, core, operation), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def walk_inputs(base_path):
+    """(path, operation, core, nf, ext) of the NF files under base_path, from folder and file names."""
     pattern_dir = re.compile(r"(\d+)_.*_(ue_reg_pdu|ue_reg|ue_dereg|pdu_est|pdu_rel)_(aether|open5gs|free5gc)")
     pattern_file = re.compile(
-        r"(?P<ue_num>\d+|open5gs|free5gc|aether)_(?P<nf>[a-z0-9\-]+)(?:_capture)?(?P<ext>\.json|\.pdml)$"
+        r"(?P<ue_num>\d+|open5gs|free5gc|aether)_(?P<nf>[a-z0-9\-]+)(?:_capture)?(?P<ext>\.json|\.pdml|\.tsv|\.pcapng|\.pcap)$"
     )
 
     for path in base_path.rglob("*"):
@@ -103,15 +131,50 @@ def detect_and_run(base_dir, output_dir):
         match_file = pattern_file.match(path.name)
 
         if not match_dir or not match_file:
-            if path.suffix in {'.pdml', '.json'}:
+            if path.suffix in {'.pdml', '.json', '.tsv'}:
                 print(f"[WARN] Skipping unrecognized file format: {path}")
             continue
 
-        ue_count, operation, core = match_dir.groups()
-        nf = match_file.group("nf")
-        ext = match_file.group("ext")
+        _, operation, core = match_dir.groups()
+        yield path, operation, core, match_file.group("nf"), match_file.group("ext")
+
 
-        scripts = SCRIPT_MAP.get(core, {}).get(operation, {}).get(nf, {}).get(ext, [])
+def catalog_inputs(catalog):
+    """Same as walk_inputs(), from a catalog built by catalog.py."""
+    for entry in catalog.files(kind=["capture", "converted"]):
+        if entry["nf"] is None:
+            if entry["ext"] in {'.pdml', '.json', '.tsv'}:
+                print(f"[WARN] Skipping unrecognized file format: {entry['path']}")
+            continue
+        yield Path(entry["path"]), entry["operation"], entry["core"], entry["nf"], entry["ext"]
+
+
+def detect_and_run(base_dir, output_dir, raw_captures=False, jobs=1, streams=False, transactions=False, catalog=None):
+    if catalog:
+        catalog = Catalog(catalog)
+        base_path = Path(catalog.root)
+        inputs = list(catalog_inputs(catalog))
+        catalog.close()
+    else:
+        base_path = Path(base_dir)
+        inputs = walk_inputs(base_path)
+
+    tasks = []
+    for path, operation, core, nf, ext in inputs:
+        # Either work on raw captures or on tshark-converted files, never both
+        if (ext in RAW_CAPTURE_EXTS) != raw_captures:
+            continue
+
+        nf_scripts = SCRIPT_MAP.get(core, {}).get(operation, {}).get(nf, {})
+        if ext in RAW_CAPTURE_EXTS:
+            scripts = nf_scripts.get(".json") or nf_scripts.get(".pdml", [])
+            # Request/response pairing replaces the payload pattern heuristics
+            if transactions and ".json" in nf_scripts:
+                scripts = [TRANSACTIONS_SCRIPT]
+            if streams and ".json" in nf_scripts:
+                scripts = scripts + [STREAMS_SCRIPT]
+        else:
+            scripts = nf_scripts.get(ext, [])
 
         for script in scripts:
             print("\n🔍 Detected:")
@@ -125,39 +188,27 @@ def detect_and_run(base_dir, output_dir):
             out_subdir = Path(output_dir) / path.relative_to(base_path).parent
             out_subdir.mkdir(parents=True, exist_ok=True)
 
-            # Call script via subprocess and pass args
-            try:
-                input_dir = str(path.parent)
-                input_file = path.name
-
-                # Build command
-                cmd = ["python3", script, "--input", input_dir, "--name", input_file, "--output", str(out_subdir)]
-                
-                # If the script requires a pattern (like ue_reg_json.py), pass nf
-                # if "ue_reg_json.py" in script:
-                #     cmd += ["--pattern", nf]
-                # elif "pdu_est.py" in script:
-                #     cmd += ["--pattern", nf]
-                # elif "pdu_rel.py" in script:
-                #     cmd += ["--pattern", nf]
-
-                cmd += ["--pattern", nf]
-                cmd += ["--core", core]
-
-                # print(cmd)
-
-                subprocess.run(cmd, check=True)
-
-                # Count lines in the resulting CSV file (if created)
-                output_csv = out_subdir / f"{input_file}.csv"
-                if output_csv.exists():
-                    with open(output_csv, "r", encoding="utf-8") as f:
-                        line_count = sum(1 for _ in f) - 1  # subtract 1 for header
-                    print(f"📊 {output_csv.name}: {line_count} data row(s)")
+            suffix = ".streams.csv" if script == STREAMS_SCRIPT else ".csv"
+            output_csv = out_subdir / f"{path.name}{suffix}"
+            tasks.append((script, str(path), str(output_csv), nf, core, operation))
 
+    def report(task, result):
+        script, input_path, output_csv, *_ = task
+        count, error = result
+        if error:
+            print(f"[ERROR] Failed to run {script} on {input_path}: {error}")
+        else:
+            print(f"📊 {Path(output_csv).name}: {count} data row(s)")
 
-            except subprocess.CalledProcessError as e:
-                print(f"[ERROR] Failed to run {script} on {path}: {e}")
+    # Scripts run in-process; --jobs spreads the files over worker processes
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(run_analysis, *task): task for task in tasks}
+            for future in as_completed(futures):
+                report(futures[future], future.result())
+    else:
+        for task in tasks:
+            report(task, run_analysis(*task))
 
 
 
@@ -165,6 +216,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Detect NF files and map to scripts")
     parser.add_argument("--input", "-i", default="/mnt/c/Dev/master/pcap_captures/open5gs/test", help="Path to search recursively")
     parser.add_argument("--output", "-o", default="/mnt/c/Dev/master/pcap_captures/open5gs/output", help="Directory to store outputs")
+    parser.add_argument("--pcap", action="store_true", help="Analyse raw .pcap/.pcapng captures directly instead of tshark JSON/PDML")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of files analysed in parallel")
+    parser.add_argument("--streams", action="store_true", help="With --pcap, also write HTTP/2 request/response streams of the SBI NFs")
+    parser.add_argument("--transactions", action="store_true", help="With --pcap, time SBI NFs from HTTP/2 request/response pairs instead of payload patterns")
+    parser.add_argument("--catalog", help="Take the input files from this catalog (catalog.py) instead of walking --input")
     args = parser.parse_args()
 
-    detect_and_run(args.input, args.output)
+    detect_and_run(args.input, args.output, raw_captures=args.pcap, jobs=args.jobs,
+                   streams=args.streams, transactions=args.transactions, catalog=args.catalog)
@@ -1,44 +1,55 @@
 import os
+import sys
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_simple_numeric_id(row):
-    """Extracts a simple numeric UE ID from ran_ue_ngap_id or IMSI/SUCI strings."""
-    if pd.notna(row.get("id")):
-        return int(str(row["id"]).strip())
-    elif pd.notna(row.get("imsi")):
-        digits = ''.join(filter(str.isdigit, str(row["imsi"])))
-        if len(digits) >= 6:
-            return int(digits[-6:])  # Use last 6 digits as ID
-        elif digits:
-            return int(digits)
-    return None
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from run_metadata import find_run
+from parquet_store import require_pyarrow, write_results
+
+def extract_numeric_ids(df):
+    """Simple numeric UE IDs: the id column (ran_ue_ngap_id) where set, else the last 6 digits of IMSI/SUCI strings."""
+    ids = pd.Series(float("nan"), index=df.index)
+    if "imsi" in df.columns:
+        digits = df["imsi"].astype("string").str.replace(r"\D", "", regex=True)
+        ids = pd.to_numeric(digits.str.extract(r"(\d{1,6})$", expand=False), errors="coerce")
+    if "id" in df.columns:
+        id_column = pd.to_numeric(df["id"], errors="coerce")
+        ids = id_column.where(id_column.notna(), ids)
+    return ids
 
 def process_csv_file(input_file, output_file):
     df = pd.read_csv(input_file)
 
+    # SBI transaction CSVs already carry measured service times: sum them per UE
+    if "delta_ms" in df.columns:
+        output_df = df.dropna(subset=["id"]).groupby("id", as_index=False).agg(
+            first_timestamp=("first_timestamp", "min"),
+            last_timestamp=("last_timestamp", "max"),
+            delta_ms=("delta_ms", "sum"),
+        )
+        output_df["id"] = output_df["id"].astype(int)
+        write_output(output_df, input_file, output_file)
+        return output_df
+
     if "timestamp" not in df.columns:
         print(f"Skipping {input_file} due to missing 'timestamp'.")
         return
 
-    df["id"] = df.apply(extract_simple_numeric_id, axis=1)
+    df["id"] = extract_numeric_ids(df)
     df = df.dropna(subset=["id", "timestamp"])
 
-    results = []
-
-    for id_val, group in df.groupby("id"):
-        group_sorted = group.sort_values(by="timestamp")
-        first = group_sorted["timestamp"].iloc[0]
-        last = group_sorted["timestamp"].iloc[-1]
-        delta = float(last) - float(first)
-        results.append({
-            "id": int(id_val),
-            "first_timestamp": first,
-            "last_timestamp": last,
-            "delta_ms": delta * 1000  # milliseconds
-        })
-
-    output_df = pd.DataFrame(results)
+    output_df = df.groupby("id", as_index=False).agg(
+        first_timestamp=("timestamp", "min"),
+        last_timestamp=("timestamp", "max"),
+    )
+    output_df["id"] = output_df["id"].astype(int)
+    output_df["delta_ms"] = (output_df["last_timestamp"] - output_df["first_timestamp"]) * 1000  # milliseconds
     output_df = output_df[output_df["delta_ms"] != 0]  # Exclude zero-duration entries
+    write_output(output_df, input_file, output_file)
+    return output_df
+
+def write_output(output_df, input_file, output_file):
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     output_df.to_csv(output_file, index=False)
 
@@ -46,7 +57,36 @@ def process_csv_file(input_file, output_file):
     print(f"Entries: \t {len(output_df)}")
     print()
 
-def process_csv_recursively(input_root, output_root):
+def parquet_rows(output_df, input_file):
+    """Typed result rows for the Parquet dataset, with run metadata from the capture folder name."""
+    run = find_run(os.path.dirname(input_file))
+    if not run or output_df.empty:
+        print(f"[WARN] No run metadata for {input_file}, not added to Parquet")
+        return []
+    nf = os.path.basename(input_file).split("_")[1].split(".")[0]  # e.g. open5gs_udm.json.csv -> udm
+    rows = pd.DataFrame({
+        "core": run["core"],
+        "operation": run["operation"],
+        "ue_count": run["ue_count"],
+        "mode": run["mode"],
+        "mean_delay": run["mean_delay"],
+        "nf": nf,
+        "ue_id": output_df["id"].astype("int64"),
+        "first_timestamp": output_df["first_timestamp"].astype(float),
+        "last_timestamp": output_df["last_timestamp"].astype(float),
+        "delta_ms": output_df["delta_ms"].astype(float),
+    })
+    return rows.to_dict("records")
+
+def process_one(input_path, output_path, parquet=None):
+    """process_csv_file() plus its Parquet rows; runs in a worker process with --jobs."""
+    output_df = process_csv_file(input_path, output_path)
+    if parquet and output_df is not None:
+        return parquet_rows(output_df, input_path)
+    return []
+
+def process_csv_recursively(input_root, output_root, parquet=None, jobs=1):
+    tasks = []
     for root, _, files in os.walk(input_root):
         for file in files:
             if not file.endswith(".csv"):
@@ -54,13 +94,32 @@ def process_csv_recursively(input_root, output_root):
             input_path = os.path.join(root, file)
             relative_path = os.path.relpath(input_path, input_root)
             output_path = os.path.join(output_root, relative_path)
-            process_csv_file(input_path, output_path)
+            tasks.append((input_path, output_path, parquet))
+
+    rows = []
+    # Files are independent; --jobs spreads them over worker processes
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for file_rows in pool.map(process_one, *zip(*tasks)):
+                rows.extend(file_rows)
+    else:
+        for task in tasks:
+            rows.extend(process_one(*task))
+
+    if parquet:
+        count = write_results(rows, parquet)
+        print(f"[OK] Parquet: {count} rows → {parquet}")
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Recursively parse UE reg/dereg CSVs and output processed results.")
     parser.add_argument("--input", "-i", required=True, help="Input directory containing raw CSV files.")
     parser.add_argument("--output", "-o", required=True, help="Output directory to store processed CSVs.")
+    parser.add_argument("--parquet", help="Also write typed results to this Parquet dataset (needs pyarrow)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of CSV files processed in parallel")
     args = parser.parse_args()
 
-    process_csv_recursively(args.input, args.output)
+    if args.parquet:
+        require_pyarrow()
+
+    process_csv_recursively(args.input, args.output, parquet=args.parquet, jobs=args.jobs)
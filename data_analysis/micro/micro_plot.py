@@ -1,10 +1,15 @@
 import os
+import sys
 import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from collections import defaultdict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from parquet_store import read_results
+from catalog import Catalog
+
 PRETTY_NAMES = {
     "core": {
         "open5gs": "Open5GS",
@@ -58,6 +63,32 @@ def collect_nf_data_from_folder(folder_path, test_number):
             nf_data[key] = nf_data.get(key, 0) + df["delta_ms"].sum()
     return nf_data
 
+def collect_nf_data_from_parquet(root):
+    """{(operation, core): {(test_number, NF): total delta_ms}} summed inside the Parquet scan."""
+    df = read_results(root, columns=["operation", "core", "ue_count", "nf", "delta_ms"])
+    totals = df.groupby(["operation", "core", "ue_count", "nf"])["delta_ms"].sum()
+    groups = defaultdict(dict)
+    for (operation, core, ue_count, nf), value in totals.items():
+        groups[(operation, core)][(str(ue_count), nf.upper())] = value
+    return groups
+
+def collect_nf_data_from_catalog(db_path):
+    """Same groups as the folder walk, with core/operation/UE count taken from the catalog."""
+    catalog = Catalog(db_path)
+    files = catalog.files(ext=".csv", kind="table")
+    catalog.close()
+
+    groups = defaultdict(dict)
+    for entry in files:
+        df = pd.read_csv(entry["path"])
+        if "delta_ms" not in df.columns:
+            continue
+        nf_name = entry["name"].split("_")[1].split(".")[0].upper()
+        key = (str(entry["ue_count"]), nf_name)
+        combined_data = groups[(entry["operation"], entry["core"])]
+        combined_data[key] = combined_data.get(key, 0) + df["delta_ms"].sum()
+    return groups
+
 def plot_nf_bars(nf_data, output_path, title, side=False):
     ue_counts = sorted(set(k[0] for k in nf_data))
     nf_names = sorted(set(k[1] for k in nf_data))
@@ -131,28 +162,38 @@ if __name__ == "__main__":
     parser.add_argument("--output", "-o", default="./plots", help="Output directory for plots and CSVs.")
     parser.add_argument("--side", action="store_true", help="Display NFs side by side instead of stacked")
     parser.add_argument("--ms", required=True, type=str)
+    parser.add_argument("--parquet", action="store_true", help="Input is a Parquet dataset written by micro_parser.py --parquet")
+    parser.add_argument("--catalog", help="Catalog (catalog.py) of the input tree, used instead of walking it")
     args = parser.parse_args()
 
     ms = args.ms
 
-    groups = defaultdict(list)  # (operation, core) -> list of (folder_path, test_number)
-
-    for root, dirs, _ in os.walk(args.input):
-        for d in dirs:
-            parsed = parse_folder_metadata(d)
-            if parsed:
-                test_number, operation, core = parsed
-                groups[(operation, core)].append((os.path.join(root, d), test_number))
+    if args.parquet:
+        combined_groups = collect_nf_data_from_parquet(args.input)
+    elif args.catalog:
+        combined_groups = collect_nf_data_from_catalog(args.catalog)
+    else:
+        groups = defaultdict(list)  # (operation, core) -> list of (folder_path, test_number)
+
+        for root, dirs, _ in os.walk(args.input):
+            for d in dirs:
+                parsed = parse_folder_metadata(d)
+                if parsed:
+                    test_number, operation, core = parsed
+                    groups[(operation, core)].append((os.path.join(root, d), test_number))
+
+        combined_groups = {}
+        for (operation, core), folder_info in groups.items():
+            combined_data = {}
+            for folder_path, test_number in folder_info:
+                nf_data = collect_nf_data_from_folder(folder_path, test_number)
+                for key, value in nf_data.items():
+                    combined_data[key] = combined_data.get(key, 0) + value
+            combined_groups[(operation, core)] = combined_data
 
     os.makedirs(args.output, exist_ok=True)
 
-    for (operation, core), folder_info in groups.items():
-        combined_data = {}
-        for folder_path, test_number in folder_info:
-            nf_data = collect_nf_data_from_folder(folder_path, test_number)
-            for key, value in nf_data.items():
-                combined_data[key] = combined_data.get(key, 0) + value
-
+    for (operation, core), combined_data in combined_groups.items():
         pretty_core = PRETTY_NAMES["core"].get(core.lower(), core.capitalize())
         pretty_op = PRETTY_NAMES["operation"].get(operation.lower(), operation.replace("_", " ").title())
         basename = f"{pretty_core} - {pretty_op}".replace(" ", "_")
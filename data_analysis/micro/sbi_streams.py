@@ -0,0 +1,39 @@
+import os
+import sys
+import csv
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from http2_reader import RECORD_FIELDS, read_pcap_http2
+
+# SBI request/response records per HTTP/2 stream, straight from a raw capture
+#   Any NF speaking h2c (AUSF, PCF, SMF, UDM, ...)
+
+
+# === Process Packets (raw capture) ===
+def run(input_path, output_csv, nf=None, core=None, operation=None):
+    if not input_path.endswith((".pcap", ".pcapng")):
+        raise ValueError(f"HTTP/2 streams need a raw .pcap/.pcapng capture: {input_path}")
+
+    count = 0
+    with open(output_csv, "w", newline='', encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=RECORD_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for record in read_pcap_http2(input_path):
+            writer.writerow(record)
+            count += 1
+
+    print(f"✅ Parsed {count} HTTP/2 streams to {output_csv}")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild HTTP/2 SBI request/response streams from a capture")
+    parser.add_argument("--name", "-n", required=True, type=str)
+    parser.add_argument("--input", "-i", type=str, help="Input directory")
+    parser.add_argument("--output", "-o", default=".csv", type=str)
+    parser.add_argument("--pattern", type=str, help="Network Function (unused, accepted for micro.py)")
+    parser.add_argument("--core", type=str, help="Core name (unused, accepted for micro.py)")
+    args = parser.parse_args()
+
+    run(os.path.join(args.input, args.name), f"{args.output}/{args.name}.streams.csv", args.pattern, args.core)
@@ -0,0 +1,42 @@
+import os
+import sys
+import csv
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sbi_correlator import TRANSACTION_FIELDS, correlate_capture
+
+# Per-UE SBI service time of the captured NF, from HTTP/2 request/response pairs
+#   Any NF speaking h2c (AUSF, PCF, SMF, UDM, ...)
+
+
+# === Process Packets (raw capture) ===
+def run(input_path, output_csv, nf, core=None, operation=None):
+    if not input_path.endswith((".pcap", ".pcapng")):
+        raise ValueError(f"SBI transactions need a raw .pcap/.pcapng capture: {input_path}")
+
+    correlator = correlate_capture(input_path, nf)
+
+    count = 0
+    with open(output_csv, "w", newline='', encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=TRANSACTION_FIELDS)
+        writer.writeheader()
+        for row in correlator.rows():
+            writer.writerow(row)
+            count += 1
+
+    print(f"✅ Correlated {count} UE operations to {output_csv} "
+          f"({correlator.unattributed} without UE, {correlator.incomplete} unanswered)")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-UE SBI service times from HTTP/2 request/response pairs")
+    parser.add_argument("--name", "-n", required=True, type=str)
+    parser.add_argument("--input", "-i", type=str, help="Input directory")
+    parser.add_argument("--output", "-o", default=".csv", type=str)
+    parser.add_argument("--pattern", required=True, type=str, help="Network Function of the capture, e.g. udm")
+    parser.add_argument("--core", type=str, help="Core name (unused, accepted for micro.py)")
+    args = parser.parse_args()
+
+    run(os.path.join(args.input, args.name), f"{args.output}/{args.name}.csv", args.pattern, args.core)
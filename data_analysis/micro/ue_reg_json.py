@@ -1,28 +1,14 @@
-import json
 import re
-import csv
 import os
+import sys
 import argparse
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sbi_reader import parse_sbi_events, write_events_csv
+
 # UE Registration
 #   AUSF, PCF, UDM
 
-# === CLI Argument ===
-parser = argparse.ArgumentParser(description="Parse messages using specified NF pattern set")
-parser.add_argument("--name", "-n", required=True, type=str)
-parser.add_argument("--input", "-i", type=str, help="Input directory")
-parser.add_argument("--output", "-o", default=".csv", type=str)
-parser.add_argument("--pattern", required=True, type=str, help="Network Function: udm, ausf, pcf")
-parser.add_argument("--core", required=True, type=str, help="Core name: free5gc, open5gs, aether")
-args = parser.parse_args()
-
-# === Input/Output ===
-# path = "../data/linear/open5gs/ue_reg/"
-path = args.input
-input_file = args.name  # 100.udm.ue_reg.json
-output_csv = f"{args.output}/{input_file}.csv"
-
-
 # === Pattern Definitions ===
 pattern_udm = [
     # Open5GS
@@ -53,8 +39,6 @@ pattern_pcf = [
     # Aether
 ]
 
-use_imsi_id = False
-
 # === Select Pattern Set ===
 pattern_matrix = {
     ("udm", "free5gc"): (pattern_udm, True),
@@ -68,30 +52,6 @@ pattern_matrix = {
     # ("pcf", "aether"): (pattern_pcf, True),
 }
 
-try:
-    patterns, use_imsi_id = pattern_matrix[(args.pattern, args.core)]
-except KeyError:
-    raise ValueError(f"Unsupported combination: pattern={args.pattern}, core={args.core}")
-
-# print(patterns)
-
-# === Decode TCP Payload ===
-def decode_payload(hex_str):
-    try:
-        hex_str_clean = hex_str.replace(":", "")
-        decoded_bytes = bytes.fromhex(hex_str_clean)
-        decoded_text = decoded_bytes.decode("utf-8", errors="ignore")
-        return ''.join(c for c in decoded_text if c.isprintable()).replace('\n', '').replace('\r', '')
-    except Exception:
-        return ""
-
-# === Match Pattern Type ===
-def match_pattern_type(decoded_text):
-    for idx, pattern in enumerate(patterns):
-        if pattern.search(decoded_text):
-            return idx
-    return None
-
 def extract_ids(text):
     match = re.search(r"(imsi-\d{5,15}|suci-\d+(?:-\d+){5,})", text, re.IGNORECASE)
     if not match:
@@ -100,61 +60,27 @@ def extract_ids(text):
     digits = ''.join(filter(str.isdigit, match.group(1)))
     return int(digits[-10:]) if digits else None
 
-# === Process PCAP JSON ===
-events = []
-# pattern_counters = {0: 1, 1: 1}
-pattern_counters = {i: 1 for i in range(len(patterns))}
-
-with open(os.path.join(path, input_file), "r") as f:
-    packets = json.load(f)
-
-for pkt in packets:
-    layers = pkt.get("_source", {}).get("layers", {})
-    tcp = layers.get("tcp", {})
-    payload = tcp.get("tcp.payload")
-    frame_number = layers.get("frame", {}).get("frame.number", "N/A")
-    timestamp = layers.get("frame", {}).get("frame.time_relative", "N/A")
-
-    sll = layers.get("sll", {})
-    pkttype = sll.get("sll.pkttype")
-    if pkttype == "0":
-        direction = "recv"
-    elif pkttype == "4":
-        direction = "send"
-    else:
-        direction = "unknown"
-
-    if not payload:
-        continue
+# === Process Packets (tshark JSON or raw capture) ===
+def run(input_path, output_csv, nf, core, operation=None):
+    try:
+        patterns, use_imsi_id = pattern_matrix[(nf, core)]
+    except KeyError:
+        raise ValueError(f"Unsupported combination: pattern={nf}, core={core}")
 
-    decoded = decode_payload(payload)
-    pattern_type = match_pattern_type(decoded)
+    events = parse_sbi_events(input_path, patterns, use_imsi_id, extract_ids)
+    count = write_events_csv(events, output_csv)
 
-    if decoded.strip() and pattern_type is not None:
-        if use_imsi_id:
-            imsi = extract_ids(decoded)
-            if imsi:
-                event_id = imsi
-            else:
-                event_id = pattern_counters[pattern_type]
-                pattern_counters[pattern_type] += 1
-        else:
-            event_id = pattern_counters[pattern_type]
-            pattern_counters[pattern_type] += 1
+    print(f"✅ Parsed {count} events to {output_csv} using pattern: {nf}")
+    return count
 
-        events.append({
-            "frame_number": frame_number,
-            "timestamp": timestamp,
-            "direction": direction,
-            "id": event_id,
-            "decoded_payload": decoded
-        })
 
-# === Save CSV ===
-with open(output_csv, "w", newline='', encoding="utf-8") as csvfile:
-    fieldnames = ["frame_number", "timestamp", "direction", "id", "decoded_payload"]
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(events)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse messages using specified NF pattern set")
+    parser.add_argument("--name", "-n", required=True, type=str)
+    parser.add_argument("--input", "-i", type=str, help="Input directory")
+    parser.add_argument("--output", "-o", default=".csv", type=str)
+    parser.add_argument("--pattern", required=True, type=str, help="Network Function: udm, ausf, pcf")
+    parser.add_argument("--core", required=True, type=str, help="Core name: free5gc, open5gs, aether")
+    args = parser.parse_args()
 
-print(f"✅ Parsed {len(events)} events to {output_csv} using pattern: {args.pattern}")
+    run(os.path.join(args.input, args.name), f"{args.output}/{args.name}.csv", args.pattern, args.core)
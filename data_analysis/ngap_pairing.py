@@ -0,0 +1,53 @@
+from collections import namedtuple
+
+# NGAP procedure pairing: for every RAN UE NGAP ID, find the message that opens a
+# procedure ("first") and the one that closes it ("release"). All configured
+# procedures are tracked at once, so a capture only has to be read a single time.
+
+ProcedurePair = namedtuple("ProcedurePair", ["first_code", "release_code", "release_types"])
+
+# release_types=None accepts a release message of any PDU type
+AMF_PROCEDURES = {
+    "ue_reg":     ProcedurePair("15", "14", ("initiating",)),  # InitialUEMessage -> InitialContextSetup
+    "ue_reg_pdu": ProcedurePair("15", "29", ("initiating",)),  # InitialUEMessage -> PDU Session Resource Setup Request
+    "ue_dereg":   ProcedurePair("46", "41", None),             # Uplink NAS Transport -> UEContextReleaseCommand
+    "pdu_est":    ProcedurePair("46", "29", ("initiating",)),  # Uplink NAS Transport -> PDU Session Resource Setup Request
+    "pdu_rel":    ProcedurePair("46", "28", ("initiating",)),  # Uplink NAS Transport -> PDU Session Resource Release Request
+}
+
+# End-to-end view from the UERANSIM capture: the procedure also ends on the successful outcome
+MACRO_PROCEDURES = {
+    name: pair._replace(release_types=("initiating", "successful"))
+    for name, pair in AMF_PROCEDURES.items()
+}
+
+
+def pair_procedures(records, procedures):
+    """
+    Consume (ran_id, frame_number, timestamp, procedure_code, pdu_type, direction) records
+    in frame order and return {procedure_name: [row, ...]} with a "first" and a "release"
+    row per RAN UE NGAP ID, in order of first appearance.
+    """
+    # procedure name -> ran_id -> [first, release], each (frame_number, timestamp, direction)
+    state = {name: {} for name in procedures}
+
+    for ran_id, frame_number, timestamp, procedure_code, pdu_type, direction in records:
+        for name, pair in procedures.items():
+            if procedure_code == pair.first_code and pdu_type == "initiating":
+                entry = state[name].setdefault(ran_id, [None, None])
+                if not entry[0]:
+                    entry[0] = (frame_number, timestamp, direction)
+                    continue
+            if procedure_code == pair.release_code and (pair.release_types is None or pdu_type in pair.release_types):
+                state[name].setdefault(ran_id, [None, None])[1] = (frame_number, timestamp, direction)
+
+    results = {}
+    for name, pair in procedures.items():
+        rows = []
+        for ran_id, (first, release) in state[name].items():
+            if first:
+                rows.append({"id": ran_id, "frame_number": first[0], "timestamp": first[1], "type": "first", "procedure_code": pair.first_code, "direction": first[2]})
+            if release:
+                rows.append({"id": ran_id, "frame_number": release[0], "timestamp": release[1], "type": "release", "procedure_code": pair.release_code, "direction": release[2]})
+        results[name] = rows
+    return results
@@ -0,0 +1,124 @@
+import csv
+import xml.etree.ElementTree as ET
+
+# Fields requested from tshark in field-extraction mode (convert_pcap.py --ngap-format fields).
+# ngap.NGAP_PDU is the PDU choice index, one per NGAP PDU, so it stays aligned with
+# procedureCode when an SCTP packet carries several PDUs.
+NGAP_FIELDS = [
+    "frame.number",
+    "frame.time_relative",
+    "sll.pkttype",
+    "ngap.RAN_UE_NGAP_ID",
+    "ngap.procedureCode",
+    "ngap.NGAP_PDU",
+]
+
+NGAP_PDU_TYPES = {"0": "initiating", "1": "successful", "2": "unsuccessful"}
+
+
+def pkttype_to_direction(pkttype):
+    return "recv" if pkttype == "0" else "send" if pkttype == "4" else None
+
+
+def tshark_fields_args():
+    args = ["-E", "header=y", "-E", "separator=/t", "-E", "occurrence=a", "-E", "aggregator=,"]
+    for field in NGAP_FIELDS:
+        args += ["-e", field]
+    return args
+
+
+def pair_occurrences(frame_number, timestamp, direction, ran_ids, procedure_codes, pdu_types):
+    """Yield one tuple per RAN UE NGAP ID, matched by position with its procedure code and PDU type."""
+    for idx, ran_id in enumerate(ran_ids):
+        proc_code = procedure_codes[idx] if idx < len(procedure_codes) else (procedure_codes[-1] if procedure_codes else None)
+        pdu_type = pdu_types[idx] if idx < len(pdu_types) else (pdu_types[-1] if pdu_types else None)
+        yield (ran_id, frame_number, timestamp, proc_code, pdu_type, direction)
+
+
+def read_ngap_fields(path):
+    """
+    Read a tshark field-extraction TSV and yield
+    (ran_id, frame_number, timestamp, procedure_code, pdu_type, direction) tuples.
+    """
+    with open(path, "r", newline="") as f:
+        reader = csv.DictReader(f, delimiter="\t")
+        for row in reader:
+            ran_ids = [v for v in row.get("ngap.RAN_UE_NGAP_ID", "").split(",") if v]
+            if not ran_ids:
+                continue
+            procedure_codes = [v for v in row.get("ngap.procedureCode", "").split(",") if v]
+            pdu_types = [NGAP_PDU_TYPES.get(v) for v in row.get("ngap.NGAP_PDU", "").split(",") if v]
+            yield from pair_occurrences(
+                int(row["frame.number"]),
+                row["frame.time_relative"],
+                pkttype_to_direction(row.get("sll.pkttype")),
+                ran_ids,
+                procedure_codes,
+                pdu_types,
+            )
+
+
+def _pdml_packet_fields(packet):
+    frame_number = None
+    timestamp = None
+    direction = None
+    ran_ids = []
+    procedure_codes = []
+    pdu_types = []
+
+    for proto in packet.findall("proto"):
+        name = proto.get("name")
+        if name == "frame":
+            for field in proto.iter("field"):
+                if field.get("name") == "frame.number":
+                    frame_number = int(field.get("show"))
+                elif field.get("name") == "frame.time_relative":
+                    timestamp = field.get("show")
+        elif name == "sll":
+            for field in proto.iter("field"):
+                if field.get("name") == "sll.pkttype":
+                    direction = pkttype_to_direction(field.get("show"))
+        elif name == "ngap":
+            for field in proto.iter("field"):
+                field_name = field.get("name")
+                if field_name == "ngap.RAN_UE_NGAP_ID":
+                    ran_ids.append(field.get("show"))
+                elif field_name == "ngap.procedureCode":
+                    procedure_codes.append(field.get("show"))
+                elif field_name == "ngap.initiatingMessage_element":
+                    pdu_types.append("initiating")
+                elif field_name == "ngap.successfulOutcome_element":
+                    pdu_types.append("successful")
+
+    return frame_number, timestamp, direction, ran_ids, procedure_codes, pdu_types
+
+
+def read_ngap_pdml(path):
+    """
+    Stream a tshark PDML file one <packet> at a time and yield
+    (ran_id, frame_number, timestamp, procedure_code, pdu_type, direction) tuples.
+    Each packet is cleared once read, so memory stays flat on multi-GB files.
+    """
+    root = None
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if root is None and event == "start":
+            root = elem
+            continue
+        if event != "end" or elem.tag != "packet":
+            continue
+
+        yield from pair_occurrences(*_pdml_packet_fields(elem))
+
+        # Drop the finished packet and any references the root still holds
+        elem.clear()
+        root.clear()
+
+
+def read_ngap_records(path):
+    """Pick the NGAP reader from the file extension: raw capture, field TSV or PDML."""
+    if path.endswith((".pcap", ".pcapng")):
+        from pcap_reader import read_pcap_ngap  # pcap_reader imports this module
+        return read_pcap_ngap(path)
+    if path.endswith(".tsv"):
+        return read_ngap_fields(path)
+    return read_ngap_pdml(path)
@@ -0,0 +1,121 @@
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional, CSV stays the default
+    pa = None
+
+# Typed, partitioned store for the per-UE results of the parsers
+# (data_parser.py, micro_parser.py). One row per UE and NF; the plotting scripts
+# read it back with filters pushed down to the partition directories and
+# row groups instead of re-parsing CSV trees and folder names. load_delta_stats()
+# streams record batches into quantile sketches for bounded-memory statistics.
+
+PARTITION_COLUMNS = ["core", "operation"]
+
+RESULT_COLUMNS = [
+    ("core", "string"),
+    ("operation", "string"),
+    ("ue_count", "int32"),
+    ("mode", "string"),
+    ("mean_delay", "float64"),
+    ("nf", "string"),
+    ("ue_id", "int64"),
+    ("first_timestamp", "float64"),
+    ("last_timestamp", "float64"),
+    ("delta_ms", "float64"),
+]
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+
+
+def result_schema():
+    require_pyarrow()
+    return pa.schema([(name, pa.type_for_alias(type_name)) for name, type_name in RESULT_COLUMNS])
+
+
+def write_results(rows, root):
+    """
+    Write result rows (dicts with RESULT_COLUMNS keys; missing keys become null)
+    as a Parquet dataset under root, hive-partitioned by core/operation.
+    Partitions present in rows are replaced, others are left untouched.
+    """
+    require_pyarrow()
+    schema = result_schema()
+    table = pa.Table.from_pylist([{name: row.get(name) for name in schema.names} for row in rows], schema=schema)
+    pq.write_to_dataset(
+        table,
+        root,
+        partition_cols=PARTITION_COLUMNS,
+        existing_data_behavior="delete_matching",
+    )
+    return table.num_rows
+
+
+def _dataset(root):
+    partitioning = ds.partitioning(
+        pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS]), flavor="hive"
+    )
+    return ds.dataset(root, format="parquet", partitioning=partitioning)
+
+
+def read_results(root, columns=None, **filters):
+    """
+    Load a results dataset as a pandas DataFrame. Keyword filters are pushed down:
+    a scalar means equality, a list/tuple/set means membership, e.g.
+    read_results(root, columns=["ue_count", "delta_ms"], core="open5gs", operation=["ue_reg"]).
+    """
+    require_pyarrow()
+    expression = None
+    for name, value in filters.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            condition = ds.field(name).isin(list(value))
+        else:
+            condition = ds.field(name) == value
+        expression = condition if expression is None else expression & condition
+    return _dataset(root).to_table(columns=columns, filter=expression).to_pandas()
+
+
+def load_delta_groups(root, core=None, operation=None):
+    """{(core, operation): {ue_count label: [delta_ms, ...]}}, the shape the box/CDF plots use."""
+    df = read_results(root, columns=["core", "operation", "ue_count", "delta_ms"], core=core, operation=operation)
+    groups = {}
+    for (core_name, op_name, ue_count), values in df.dropna(subset=["delta_ms"]).groupby(
+        ["core", "operation", "ue_count"]
+    )["delta_ms"]:
+        groups.setdefault((core_name, op_name), {})[str(ue_count)] = values.tolist()
+    return groups
+
+
+def load_delta_stats(root, core=None, operation=None, batch_size=65_536):
+    """
+    {(core, operation): {ue_count label: StreamingStats}} computed batch by batch,
+    so memory stays bounded by the sketches rather than the number of rows.
+    """
+    from quantile_sketch import StreamingStats
+
+    require_pyarrow()
+    expression = None
+    for name, value in (("core", core), ("operation", operation)):
+        if value is not None:
+            condition = ds.field(name) == value
+            expression = condition if expression is None else expression & condition
+
+    groups = {}
+    scanner = _dataset(root).scanner(
+        columns=["core", "operation", "ue_count", "delta_ms"], filter=expression, batch_size=batch_size
+    )
+    for batch in scanner.to_batches():
+        df = batch.to_pandas().dropna(subset=["delta_ms"])
+        for (core_name, op_name, ue_count), values in df.groupby(["core", "operation", "ue_count"])["delta_ms"]:
+            labels = groups.setdefault((core_name, op_name), {})
+            labels.setdefault(str(ue_count), StreamingStats()).update(values.to_numpy())
+    return {
+        key: dict(sorted(labels.items(), key=lambda item: int(item[0])))
+        for key, labels in sorted(groups.items())
+    }
@@ -0,0 +1,105 @@
+import re
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Compiled matcher for the SBI pattern sets. Every regex gets a literal
+# prefilter: the substrings it cannot match without, pulled from the parsed
+# pattern. A payload only reaches the regex engine for patterns whose literal
+# is present, so most payloads cost a handful of fast substring scans instead
+# of one backtracking search per pattern.
+
+_LITERAL = sre_parse.LITERAL
+_SUBPATTERN = sre_parse.SUBPATTERN
+_BRANCH = sre_parse.BRANCH
+_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+
+
+def _best(candidates):
+    """Pick the most selective alternative set: the one whose shortest literal is longest."""
+    candidates = [c for c in candidates if c]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda c: (min(len(lit) for lit in c), -len(c)))
+
+
+def _required_literals(items):
+    """
+    Return a tuple of literals, one of which must occur in any match of the
+    parsed sequence, or None when nothing usable can be derived.
+    """
+    candidates = []
+    run = []
+
+    def flush():
+        if run:
+            candidates.append(("".join(run),))
+            run.clear()
+
+    for op, av in items:
+        if op is _LITERAL:
+            run.append(chr(av))
+            continue
+        flush()
+        if op is _SUBPATTERN:
+            _group, add_flags, del_flags, sub = av
+            # Inline flags change how the literals match; leave those groups alone
+            if not add_flags and not del_flags:
+                candidates.append(_required_literals(sub))
+        elif op is _BRANCH:
+            alternatives = [_required_literals(alt) for alt in av[1]]
+            if all(alternatives):
+                candidates.append(tuple(sorted({lit for alt in alternatives for lit in alt})))
+        elif op in _REPEATS:
+            min_count, _max_count, sub = av
+            if min_count >= 1:
+                candidates.append(_required_literals(sub))
+    flush()
+
+    return _best(candidates)
+
+
+class PatternMatcher:
+    """
+    First-match lookup over an ordered list of compiled regexes.
+    match(text) returns the index of the first pattern that matches, like
+    trying each pattern in turn, or None.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._entries = []
+        seen = set()
+
+        for idx, pattern in enumerate(self.patterns):
+            # A repeated regex can never be the first match: the earlier copy wins
+            key = (pattern.pattern, pattern.flags)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            ignore_case = bool(pattern.flags & re.IGNORECASE)
+            literals = None
+            if isinstance(pattern.pattern, str):
+                literals = _required_literals(sre_parse.parse(pattern.pattern, pattern.flags))
+            if literals and ignore_case:
+                literals = tuple(lit.lower() for lit in literals)
+            self._entries.append((idx, pattern, literals, ignore_case))
+
+    def match(self, text):
+        # Lowercasing is only equivalent to IGNORECASE folding for ASCII text
+        ascii_text = text.isascii()
+        lowered = text.lower() if ascii_text else None
+
+        for idx, pattern, literals, ignore_case in self._entries:
+            if literals:
+                if ignore_case:
+                    if ascii_text and not any(lit in lowered for lit in literals):
+                        continue
+                elif not any(lit in text for lit in literals):
+                    continue
+            if pattern.search(text):
+                return idx
+        return None
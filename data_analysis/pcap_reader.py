@@ -0,0 +1,346 @@
+import os
+import mmap
+import struct
+
+from ngap_reader import pkttype_to_direction
+
+# Reads .pcap/.pcapng captures directly and decodes just enough of
+# SLL/Ethernet -> IPv4/IPv6 -> SCTP -> NGAP (APER) to produce the same
+# (ran_id, frame_number, timestamp, procedure_code, pdu_type, direction)
+# tuples as the PDML/TSV readers, and of TCP to hand the raw SBI payloads
+# to the micro parsers, without running tshark.
+
+# === Link types ===
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8)
+
+IPPROTO_TCP = 6
+IPPROTO_SCTP = 132
+
+# === NGAP ===
+NGAP_PPID = 60
+NGAP_PORT = 38412
+NGAP_PDU_CHOICES = {0: "initiating", 1: "successful", 2: "unsuccessful"}
+IE_RAN_UE_NGAP_ID = 85
+IE_UE_NGAP_IDS = 114
+
+PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1000),  # microsecond, little endian
+    b"\xa1\xb2\xc3\xd4": (">", 1000),  # microsecond, big endian
+    b"\x4d\x3c\xb2\xa1": ("<", 1),     # nanosecond, little endian
+    b"\xa1\xb2\x3c\x4d": (">", 1),     # nanosecond, big endian
+}
+PCAPNG_SHB = b"\x0a\x0d\x0d\x0a"
+
+
+# === Capture file framing ===
+def iter_frames(path):
+    """Yield (frame_number, timestamp_ns, linktype, data) for every frame in a .pcap/.pcapng file."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:4] == PCAPNG_SHB:
+                yield from _iter_pcapng(buf)
+            elif buf[:4] in PCAP_MAGIC:
+                yield from _iter_pcap(buf)
+            else:
+                raise ValueError(f"Not a pcap/pcapng file: {path}")
+
+
+def _iter_pcap(buf):
+    endian, ns_per_unit = PCAP_MAGIC[buf[:4]]
+    linktype = struct.unpack_from(endian + "I", buf, 20)[0] & 0x0FFFFFFF
+    record = struct.Struct(endian + "IIII")
+
+    offset = 24
+    frame_number = 0
+    while offset + record.size <= len(buf):
+        ts_sec, ts_frac, caplen, _ = record.unpack_from(buf, offset)
+        offset += record.size
+        frame_number += 1
+        yield frame_number, ts_sec * 1_000_000_000 + ts_frac * ns_per_unit, linktype, buf[offset:offset + caplen]
+        offset += caplen
+
+
+def _ts_to_ns(ts, tsresol):
+    if tsresol & 0x80:
+        return (ts * 1_000_000_000) >> (tsresol & 0x7F)
+    if tsresol <= 9:
+        return ts * 10 ** (9 - tsresol)
+    return ts // 10 ** (tsresol - 9)
+
+
+def _idb_tsresol(buf, endian, offset, end):
+    # Walk the Interface Description Block options looking for if_tsresol (code 9)
+    while offset + 4 <= end:
+        code, length = struct.unpack_from(endian + "HH", buf, offset)
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            return buf[offset + 4]
+        offset += 4 + ((length + 3) & ~3)
+    return 6  # default: microseconds
+
+
+def _iter_pcapng(buf):
+    endian = "<"
+    interfaces = []  # (linktype, tsresol) per interface id
+    frame_number = 0
+    offset = 0
+
+    while offset + 12 <= len(buf):
+        if buf[offset:offset + 4] == PCAPNG_SHB:
+            # Section Header Block: byte-order magic decides endianness for the section
+            endian = "<" if buf[offset + 8:offset + 12] == b"\x4d\x3c\x2b\x1a" else ">"
+            interfaces = []
+
+        block_type, block_len = struct.unpack_from(endian + "II", buf, offset)
+        if block_len < 12:
+            break
+        body = offset + 8
+        end = offset + block_len - 4
+
+        if block_type == 1:  # Interface Description Block
+            linktype = struct.unpack_from(endian + "H", buf, body)[0]
+            interfaces.append((linktype, _idb_tsresol(buf, endian, body + 8, end)))
+        elif block_type == 6:  # Enhanced Packet Block
+            if_id, ts_high, ts_low, caplen, _ = struct.unpack_from(endian + "IIIII", buf, body)
+            linktype, tsresol = interfaces[if_id] if if_id < len(interfaces) else (LINKTYPE_ETHERNET, 6)
+            frame_number += 1
+            data = buf[body + 20:body + 20 + caplen]
+            yield frame_number, _ts_to_ns((ts_high << 32) | ts_low, tsresol), linktype, data
+        elif block_type == 3:  # Simple Packet Block, no timestamp: count it so numbering matches tshark
+            frame_number += 1
+
+        offset += block_len
+
+
+# === Protocol layers ===
+def link_layer(linktype, data):
+    """Return (sll_pkttype or None, ethertype, network-layer bytes), or None if unsupported."""
+    if linktype == LINKTYPE_LINUX_SLL:
+        if len(data) < 16:
+            return None
+        pkttype = struct.unpack_from("!H", data, 0)[0]
+        ethertype = struct.unpack_from("!H", data, 14)[0]
+        return str(pkttype), ethertype, data[16:]
+    if linktype == LINKTYPE_LINUX_SLL2:
+        if len(data) < 20:
+            return None
+        ethertype = struct.unpack_from("!H", data, 0)[0]
+        return str(data[10]), ethertype, data[20:]
+    if linktype == LINKTYPE_ETHERNET:
+        if len(data) < 14:
+            return None
+        ethertype = struct.unpack_from("!H", data, 12)[0]
+        offset = 14
+        while ethertype in ETHERTYPE_VLAN and len(data) >= offset + 4:
+            ethertype = struct.unpack_from("!H", data, offset + 2)[0]
+            offset += 4
+        return None, ethertype, data[offset:]
+    if linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        if not data:
+            return None
+        return None, ETHERTYPE_IPV6 if data[0] >> 4 == 6 else ETHERTYPE_IPV4, data
+    return None
+
+
+def ip_payload(ethertype, packet):
+    """Return (protocol, src, dst, payload) for an unfragmented IPv4/IPv6 packet, or None."""
+    if ethertype == ETHERTYPE_IPV4 and len(packet) >= 20:
+        ihl = (packet[0] & 0x0F) * 4
+        total_length, flags_fragment = struct.unpack_from("!HH", packet, 2)
+        if flags_fragment & 0x3FFF:
+            return None
+        return packet[9], packet[12:16], packet[16:20], packet[ihl:total_length or len(packet)]
+    if ethertype == ETHERTYPE_IPV6 and len(packet) >= 40:
+        payload_length = struct.unpack_from("!H", packet, 4)[0]
+        return packet[6], packet[8:24], packet[24:40], packet[40:40 + payload_length]
+    return None
+
+
+def sctp_segment(ethertype, packet):
+    """Return the SCTP segment carried by an IPv4/IPv6 packet, or None."""
+    ip = ip_payload(ethertype, packet)
+    if not ip or ip[0] != IPPROTO_SCTP:
+        return None
+    return ip[3]
+
+
+def tcp_segment(ethertype, packet):
+    """Return (src, src_port, dst, dst_port, seq, flags, payload) for a TCP packet, or None."""
+    ip = ip_payload(ethertype, packet)
+    if not ip or ip[0] != IPPROTO_TCP or len(ip[3]) < 20:
+        return None
+    _, src, dst, segment = ip
+    src_port, dst_port, seq = struct.unpack_from("!HHI", segment, 0)
+    data_offset = (segment[12] >> 4) * 4
+    flags = segment[13]
+    return src, src_port, dst, dst_port, seq, flags, segment[data_offset:]
+
+
+def ngap_payloads(segment):
+    """Yield the user data of every complete NGAP SCTP DATA chunk in a segment."""
+    if len(segment) < 12:
+        return
+    src_port, dst_port = struct.unpack_from("!HH", segment, 0)
+    offset = 12
+    while offset + 4 <= len(segment):
+        chunk_type, chunk_flags, chunk_length = struct.unpack_from("!BBH", segment, offset)
+        if chunk_length < 4:
+            break
+        # DATA chunk with both B and E bits set (unfragmented user message)
+        if chunk_type == 0 and chunk_length >= 16 and chunk_flags & 0x03 == 0x03:
+            ppid = struct.unpack_from("!I", segment, offset + 12)[0]
+            if ppid == NGAP_PPID or NGAP_PORT in (src_port, dst_port):
+                yield segment[offset + 16:offset + chunk_length]
+        offset += (chunk_length + 3) & ~3
+
+
+# === NGAP APER decoding ===
+class AperReader:
+    """Minimal aligned-PER bit reader, just enough for the NGAP PDU header and UE IDs."""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0  # bit position
+
+    def read_bits(self, n):
+        value = 0
+        for _ in range(n):
+            byte = self.data[self.pos >> 3]
+            value = (value << 1) | ((byte >> (7 - (self.pos & 7))) & 1)
+            self.pos += 1
+        return value
+
+    def align(self):
+        self.pos = (self.pos + 7) & ~7
+
+    def read_octets(self, n):
+        self.align()
+        start = self.pos >> 3
+        if start + n > len(self.data):
+            raise ValueError("APER read past end of buffer")
+        self.pos += n * 8
+        return self.data[start:start + n]
+
+    def read_length(self):
+        first = self.read_octets(1)[0]
+        if first & 0x80 == 0:
+            return first
+        if first & 0xC0 == 0x80:
+            return ((first & 0x3F) << 8) | self.read_octets(1)[0]
+        raise ValueError("Fragmented APER length not supported")
+
+    def read_open_type(self):
+        return self.read_octets(self.read_length())
+
+
+def _read_ran_ue_ngap_id(reader):
+    # RAN-UE-NGAP-ID ::= INTEGER (0..4294967295): 2-bit octet count, then the octets
+    length = reader.read_bits(2) + 1
+    return int.from_bytes(reader.read_octets(length), "big")
+
+
+def _ran_ue_ngap_ids(message):
+    ids = []
+    reader = AperReader(message)
+    reader.read_bits(1)  # extension bit of the message SEQUENCE
+    ie_count = int.from_bytes(reader.read_octets(2), "big")
+    for _ in range(ie_count):
+        ie_id = int.from_bytes(reader.read_octets(2), "big")
+        reader.read_bits(2)  # criticality
+        value = reader.read_open_type()
+
+        if ie_id == IE_RAN_UE_NGAP_ID:
+            ids.append(_read_ran_ue_ngap_id(AperReader(value)))
+        elif ie_id == IE_UE_NGAP_IDS:
+            ue_ids = AperReader(value)
+            if ue_ids.read_bits(2) == 0:  # uE-NGAP-ID-pair
+                ue_ids.read_bits(2)  # extension bit + iE-Extensions present
+                amf_id_length = ue_ids.read_bits(3) + 1
+                ue_ids.read_octets(amf_id_length)
+                ids.append(_read_ran_ue_ngap_id(ue_ids))
+    return ids
+
+
+def decode_ngap_pdu(pdu):
+    """Return (procedure_code, pdu_type, [ran_ue_ngap_ids]) for one NGAP PDU, or None if undecodable."""
+    try:
+        reader = AperReader(pdu)
+        if reader.read_bits(1):  # extension choice, not used by NGAP today
+            return None
+        pdu_type = NGAP_PDU_CHOICES.get(reader.read_bits(2))
+        procedure_code = reader.read_octets(1)[0]
+        reader.read_bits(2)  # criticality
+        message = reader.read_open_type()
+        return procedure_code, pdu_type, _ran_ue_ngap_ids(message)
+    except (IndexError, ValueError):
+        return None
+
+
+def format_relative(ns):
+    sign = "-" if ns < 0 else ""
+    seconds, fraction = divmod(abs(ns), 1_000_000_000)
+    return f"{sign}{seconds}.{fraction:09d}"
+
+
+def read_pcap_ngap(path):
+    """
+    Read a .pcap/.pcapng capture and yield
+    (ran_id, frame_number, timestamp, procedure_code, pdu_type, direction) tuples,
+    one per RAN UE NGAP ID, with the same string formats the PDML/TSV readers produce.
+    """
+    first_ns = None
+    for frame_number, ts_ns, linktype, data in iter_frames(path):
+        if first_ns is None:
+            first_ns = ts_ns
+
+        link = link_layer(linktype, data)
+        if not link:
+            continue
+        pkttype, ethertype, packet = link
+        segment = sctp_segment(ethertype, packet)
+        if not segment:
+            continue
+
+        timestamp = None
+        for payload in ngap_payloads(segment):
+            decoded = decode_ngap_pdu(payload)
+            if not decoded:
+                continue
+            procedure_code, pdu_type, ran_ids = decoded
+            if timestamp is None:
+                timestamp = format_relative(ts_ns - first_ns)
+            for ran_id in ran_ids:
+                yield (str(ran_id), frame_number, timestamp, str(procedure_code), pdu_type, pkttype_to_direction(pkttype))
+
+
+def read_pcap_tcp(path):
+    """
+    Read a .pcap/.pcapng capture and yield (frame_number, timestamp, direction, payload)
+    for every TCP segment that carries data. payload is raw bytes.
+    """
+    first_ns = None
+    for frame_number, ts_ns, linktype, data in iter_frames(path):
+        if first_ns is None:
+            first_ns = ts_ns
+
+        link = link_layer(linktype, data)
+        if not link:
+            continue
+        pkttype, ethertype, packet = link
+        tcp = tcp_segment(ethertype, packet)
+        if not tcp or not tcp[6]:
+            continue
+
+        yield frame_number, format_relative(ts_ns - first_ns), pkttype_to_direction(pkttype) or "unknown", tcp[6]
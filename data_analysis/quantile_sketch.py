@@ -0,0 +1,207 @@
+import math
+import numpy as np
+
+# Bounded-memory, mergeable statistics for delta_ms distributions.
+# Percentiles come from a DDSketch (log-spaced buckets, every quantile within
+# a relative error of RELATIVE_ACCURACY of the true value); count, min, max,
+# mean, stddev, skewness, kurtosis and the tail fractions are exact. Streams are
+# fed chunk by chunk with update(); partial results from other files, runs or
+# worker processes are combined with merge(). Objects are plain data and pickle.
+
+RELATIVE_ACCURACY = 0.01
+TAIL_THRESHOLDS_MS = (100, 200)
+
+# Values below this are counted as zero (well under any measurable delta)
+MIN_INDEXABLE = 1e-9
+
+
+class DDSketch:
+    """Relative-error quantile sketch with separate stores for positive and negative values."""
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}  # bucket index -> count
+        self.negative = {}  # bucket index of -value -> count
+        self.zero_count = 0
+        self.count = 0
+
+    def _add_to_store(self, store, values):
+        indexes, counts = np.unique(np.ceil(np.log(values) / self.log_gamma).astype(np.int64), return_counts=True)
+        for index, count in zip(indexes.tolist(), counts.tolist()):
+            store[index] = store.get(index, 0) + count
+
+    def update(self, values):
+        """Add an array of values (NaN ignored)."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        positive = values[values > MIN_INDEXABLE]
+        negative = -values[values < -MIN_INDEXABLE]
+        if positive.size:
+            self._add_to_store(self.positive, positive)
+        if negative.size:
+            self._add_to_store(self.negative, negative)
+        self.zero_count += int(values.size - positive.size - negative.size)
+        self.count += int(values.size)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for index, count in other_store.items():
+                store[index] = store.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def _value(self, index):
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def _buckets(self):
+        """(representative value, count) in ascending value order."""
+        for index in sorted(self.negative, reverse=True):
+            yield -self._value(index), self.negative[index]
+        if self.zero_count:
+            yield 0.0, self.zero_count
+        for index in sorted(self.positive):
+            yield self._value(index), self.positive[index]
+
+    def quantile(self, q):
+        """Value at quantile q in [0, 1] (same rank convention as np.percentile's linear method)."""
+        if self.count == 0:
+            return float("nan")
+        rank = q * (self.count - 1)
+        cumulative = 0
+        for value, count in self._buckets():
+            cumulative += count
+            if cumulative > rank:
+                return value
+        return value
+
+    def rank(self, value):
+        """Approximate number of values <= value."""
+        total = 0
+        for bucket_value, count in self._buckets():
+            if bucket_value > value:
+                break
+            total += count
+        return total
+
+    def cdf_points(self):
+        """(values, cumulative probabilities) at every bucket, for plotting an empirical CDF."""
+        values, counts = [], []
+        for value, count in self._buckets():
+            values.append(value)
+            counts.append(count)
+        if not values:
+            return np.array([]), np.array([])
+        return np.array(values), np.cumsum(counts) / self.count
+
+
+class StreamingStats:
+    """Exact moments, extremes and tail counts plus a DDSketch for percentiles."""
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, thresholds=TAIL_THRESHOLDS_MS):
+        self.sketch = DDSketch(relative_accuracy)
+        self.thresholds = tuple(thresholds)
+        self.above = [0] * len(self.thresholds)
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        # Central moment sums, combined with Chan et al.'s pairwise update
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.sketch.update(values)
+        for i, threshold in enumerate(self.thresholds):
+            self.above[i] += int(np.sum(values > threshold))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        mean = float(values.mean())
+        centred = values - mean
+        squared = centred * centred
+        self._combine(values.size, mean, float(squared.sum()), float((squared * centred).sum()),
+                      float((squared * squared).sum()))
+        return self
+
+    def _combine(self, n_b, mean_b, m2_b, m3_b, m4_b):
+        n_a = self.count
+        if n_a == 0:
+            self.count, self.mean, self.m2, self.m3, self.m4 = n_b, mean_b, m2_b, m3_b, m4_b
+            return
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        m2_a, m3_a = self.m2, self.m3
+        self.m4 += (m4_b + delta ** 4 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b) / n ** 3
+                    + 6 * delta ** 2 * (n_a * n_a * m2_b + n_b * n_b * m2_a) / n ** 2
+                    + 4 * delta * (n_a * m3_b - n_b * m3_a) / n)
+        self.m3 += m3_b + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2 + 3 * delta * (n_a * m2_b - n_b * m2_a) / n
+        self.m2 += m2_b + delta ** 2 * n_a * n_b / n
+        self.mean += delta * n_b / n
+        self.count = n
+
+    def merge(self, other):
+        if other.thresholds != self.thresholds:
+            raise ValueError("Cannot merge statistics with different tail thresholds")
+        if other.count == 0:
+            return self
+        self.sketch.merge(other.sketch)
+        self.above = [a + b for a, b in zip(self.above, other.above)]
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._combine(other.count, other.mean, other.m2, other.m3, other.m4)
+        return self
+
+    def percentile(self, p):
+        """Sketched percentile, clamped to the exact min/max."""
+        return min(max(self.sketch.quantile(p / 100), self.min), self.max)
+
+    def std(self):
+        """Population standard deviation, like np.std."""
+        return math.sqrt(self.m2 / self.count)
+
+    def skewness(self):
+        """Biased sample skewness, like scipy.stats.skew."""
+        return (self.m3 / self.count) / (self.m2 / self.count) ** 1.5 if self.m2 else float("nan")
+
+    def kurtosis(self):
+        """Fisher (excess) kurtosis, like scipy.stats.kurtosis."""
+        return (self.m4 / self.count) / (self.m2 / self.count) ** 2 - 3 if self.m2 else float("nan")
+
+    def fraction_above(self, threshold):
+        return self.above[self.thresholds.index(threshold)] / self.count
+
+    def count_below(self, value):
+        """Approximate number of values < value (bucket resolution)."""
+        return self.sketch.rank(value) if value > self.min else 0
+
+    def count_above(self, value):
+        """Approximate number of values > value (bucket resolution)."""
+        return self.count - self.sketch.rank(value) if value < self.max else 0
+
+
+def stats_from_csv_files(csv_files, label_of, column="delta_ms", chunksize=100_000):
+    """{label: StreamingStats} over CSV files read in chunks; label_of(path) names each file's group."""
+    import pandas as pd
+
+    groups = {}
+    for csv_path in csv_files:
+        label = label_of(csv_path)
+        header = pd.read_csv(csv_path, nrows=0)
+        if column not in header.columns:
+            continue
+        stats = groups.setdefault(label, StreamingStats())
+        for chunk in pd.read_csv(csv_path, usecols=[column], chunksize=chunksize):
+            stats.update(chunk[column].to_numpy())
+    return {label: stats for label, stats in groups.items() if stats.count}
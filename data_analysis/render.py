@@ -0,0 +1,102 @@
+import os
+import json
+import pickle
+import hashlib
+import matplotlib
+
+matplotlib.use("Agg")  # headless: figures are only ever written to files
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Render scheduler for the plotting scripts. A job is one call of a module-level
+# plotting function that builds its own matplotlib Figure (no pyplot state) and
+# writes its outputs, so jobs can run in worker processes. With a cache file,
+# jobs whose function, arguments and input data hash to the same value as at
+# the last render, and whose outputs still exist, are skipped.
+
+CACHE_NAME = ".render_cache.json"
+
+
+class RenderJob:
+    def __init__(self, function, args=(), kwargs=None, outputs=()):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.outputs = list(outputs)
+
+    @property
+    def key(self):
+        return self.outputs[0] if self.outputs else f"{self.function.__module__}.{self.function.__qualname__}"
+
+    def digest(self):
+        h = hashlib.sha256(f"{self.function.__module__}.{self.function.__qualname__}".encode())
+        h.update(pickle.dumps((self.args, sorted(self.kwargs.items())), protocol=4))
+        return h.hexdigest()
+
+    def run(self):
+        return self.function(*self.args, **self.kwargs)
+
+
+def _run_job(job):
+    job.run()
+
+
+def load_cache(cache_path):
+    if cache_path and os.path.isfile(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_cache(cache_path, cache):
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+
+
+def render_all(jobs, workers=1, cache_path=None):
+    """
+    Run render jobs, in a process pool when workers > 1. With cache_path,
+    unchanged jobs are skipped and the cache is updated for the ones that ran.
+    Returns (rendered, skipped, failed) counts.
+    """
+    cache = load_cache(cache_path)
+    pending = []
+    skipped = 0
+    for job in jobs:
+        digest = job.digest() if cache_path else None
+        if digest and cache.get(job.key) == digest and all(os.path.exists(path) for path in job.outputs):
+            print(f"[SKIP] Unchanged: {job.key}")
+            skipped += 1
+            continue
+        pending.append((job, digest))
+
+    rendered = failed = 0
+
+    def finish(job, digest, error):
+        nonlocal rendered, failed
+        if error:
+            print(f"[ERROR] Rendering {job.key} failed: {type(error).__name__}: {error}")
+            failed += 1
+            cache.pop(job.key, None)
+        else:
+            rendered += 1
+            if digest:
+                cache[job.key] = digest
+
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_run_job, job): (job, digest) for job, digest in pending}
+            for future in as_completed(futures):
+                finish(*futures[future], future.exception())
+    else:
+        for job, digest in pending:
+            try:
+                job.run()
+                finish(job, digest, None)
+            except Exception as e:
+                finish(job, digest, e)
+
+    if cache_path:
+        save_cache(cache_path, cache)
+    return rendered, skipped, failed
@@ -0,0 +1,49 @@
+import re
+
+# Run metadata encoded in the capture directory names written by capture_scripts/:
+#   core NFs:  ${ue_count}_${mode}_${mean_delay}_${test}_${core}_${timestamp}
+#   UERANSIM:  ${ue_count}_UEs_ueransim_${core}_${mean_delay}_${test}_${mode}_${timestamp}
+
+CORES = ("open5gs", "free5gc", "aether")
+OPERATIONS = ("ue_reg_pdu", "ue_reg", "ue_dereg", "pdu_est", "pdu_rel")
+MODES = ("linear", "exponential")
+
+_CORE = "|".join(CORES)
+_OPERATION = "|".join(OPERATIONS)
+_MODE = "|".join(MODES)
+_TIMESTAMP = r"\d{4}\.\d{2}\.\d{2}_\d{2}\.\d{2}"
+
+# mean_delay is missing from the oldest core captures
+CORE_RUN_DIR = re.compile(
+    rf"^(?P<ue_count>\d+)_(?P<mode>{_MODE})_(?:(?P<mean_delay>\d+(?:\.\d+)?)_)?"
+    rf"(?P<operation>{_OPERATION})(?:\.py)?_(?P<core>{_CORE})_(?P<timestamp>{_TIMESTAMP})$"
+)
+RAN_RUN_DIR = re.compile(
+    rf"^(?P<ue_count>\d+)_UEs_ueransim_(?P<core>{_CORE})_(?P<mean_delay>\d+(?:\.\d+)?)_"
+    rf"(?P<operation>{_OPERATION})(?:\.py)?_(?P<mode>{_MODE})_(?P<timestamp>{_TIMESTAMP})$"
+)
+
+
+def parse_run_dir(name):
+    """
+    Return {source, ue_count, mode, mean_delay, operation, core, timestamp} for a
+    capture directory name, or None when it does not follow either naming scheme.
+    """
+    for source, pattern in (("core", CORE_RUN_DIR), ("ueransim", RAN_RUN_DIR)):
+        match = pattern.match(name)
+        if match:
+            run = match.groupdict()
+            run["source"] = source
+            run["ue_count"] = int(run["ue_count"])
+            run["mean_delay"] = float(run["mean_delay"]) if run["mean_delay"] else None
+            return run
+    return None
+
+
+def find_run(path):
+    """parse_run_dir() for the closest directory in path that is a capture run, or None."""
+    for part in reversed(re.split(r"[\\/]", path)):
+        run = parse_run_dir(part)
+        if run:
+            return run
+    return None
@@ -0,0 +1,149 @@
+import re
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from http2_reader import read_pcap_http2
+from pcap_reader import format_relative
+
+# Turns the HTTP/2 stream records of one NF capture into per-UE service times.
+# Requests are already joined to their responses by TCP connection + HTTP/2
+# stream id in http2_reader, which drops each stream once it completes. Here
+# every transaction is attributed to a UE (SUPI/SUCI in the URI, a "supi" in the
+# request body, or a resource the UE created earlier, e.g. an SM context) and
+# to the NF that served it, then summed per (UE, NF, operation).
+
+TRANSACTION_FIELDS = ["id", "nf", "operation", "requests", "first_timestamp", "last_timestamp", "delta_ms"]
+
+UE_IN_PATH = re.compile(r"/(imsi-\d{5,15}|suci-[0-9a-fA-F-]+)(?=[/?]|$)")
+SUPI_IN_BODY = re.compile(rb'"supi"\s*:\s*"(imsi-\d{5,15})"')
+# Path segments that name a single resource rather than an API element
+RESOURCE_SEGMENT = re.compile(r"^(?:\d+|[0-9a-fA-F-]{8,}|[0-9a-zA-Z]+-\d+)$")
+
+# Resource paths (from Location headers) remembered to map follow-up requests to a UE
+MAX_RESOURCES = 100_000
+
+
+def ue_id(identity):
+    """Numeric UE id from imsi-/suci- strings, same convention as the micro parsers: last 10 MSIN digits."""
+    if identity.startswith("suci-"):
+        digits = identity.rsplit("-", 1)[-1]
+    else:
+        digits = "".join(filter(str.isdigit, identity))
+    if not digits.isdigit():
+        return None
+    return int(digits[-10:].lstrip("0") or "0")
+
+
+def service_nf(path):
+    """Producer NF from the SBI service name: /nudm-uecm/v1/... -> udm."""
+    service = path.lstrip("/").split("/", 1)[0]
+    if not service.startswith("n") or "-" not in service:
+        return None
+    return service.split("-", 1)[0][1:]
+
+
+def operation_name(method, path):
+    """Method plus path template, e.g. PUT /nudm-uecm/v1/{ueId}/registrations/amf-3gpp-access."""
+    segments = []
+    for segment in path.split("?", 1)[0].split("/"):
+        if segment.startswith(("imsi-", "suci-")):
+            segments.append("{ueId}")
+        elif RESOURCE_SEGMENT.match(segment):
+            segments.append("{id}")
+        else:
+            segments.append(segment)
+    return f"{method} {'/'.join(segments)}"
+
+
+def _to_ns(timestamp):
+    seconds, _, fraction = timestamp.partition(".")
+    sign = -1 if seconds.startswith("-") else 1
+    return sign * (abs(int(seconds)) * 1_000_000_000 + int(fraction.ljust(9, "0")[:9]))
+
+
+class TransactionCorrelator:
+    """
+    Single-pass aggregation of HTTP/2 stream records served by one NF.
+    State is the per-(UE, operation) totals plus a bounded LRU of resource paths.
+    """
+
+    def __init__(self, nf):
+        self.nf = nf
+        self.resources = OrderedDict()  # resource path -> UE id
+        self.totals = {}  # (ue, operation) -> [requests, first_ns, last_ns, total_ns]
+        self.unattributed = 0
+        self.incomplete = 0
+
+    def _remember(self, location, ue):
+        resource = urlsplit(location).path.rstrip("/")
+        if not resource:
+            return
+        self.resources[resource] = ue
+        self.resources.move_to_end(resource)
+        if len(self.resources) > MAX_RESOURCES:
+            self.resources.popitem(last=False)
+
+    def _lookup(self, path):
+        # Longest known resource the path sits under: /sm-contexts/3/modify -> /sm-contexts/3
+        path = path.split("?", 1)[0].rstrip("/")
+        while path:
+            if path in self.resources:
+                return self.resources[path]
+            path = path.rsplit("/", 1)[0]
+        return None
+
+    def _served_here(self, record):
+        if record["request_direction"] in ("recv", "send"):
+            return record["request_direction"] == "recv"
+        return service_nf(record["path"]) == self.nf
+
+    def add(self, record):
+        path = record["path"]
+        match = UE_IN_PATH.search(path)
+        ue = ue_id(match.group(1)) if match else None
+        if ue is None:
+            body = SUPI_IN_BODY.search(record.get("request_head", b""))
+            ue = ue_id(body.group(1).decode()) if body else self._lookup(path)
+        if ue is not None and record["location"]:
+            self._remember(record["location"], ue)
+
+        if not self._served_here(record):
+            return
+        end = record["response_end_time"] or record["response_time"]
+        if not record["request_time"] or not end:
+            self.incomplete += 1
+            return
+        if ue is None:
+            self.unattributed += 1
+            return
+
+        start_ns, end_ns = _to_ns(record["request_time"]), _to_ns(end)
+        key = (ue, operation_name(record["method"], path))
+        total = self.totals.get(key)
+        if total is None:
+            self.totals[key] = [1, start_ns, end_ns, end_ns - start_ns]
+        else:
+            total[0] += 1
+            total[1] = min(total[1], start_ns)
+            total[2] = max(total[2], end_ns)
+            total[3] += end_ns - start_ns
+
+    def rows(self):
+        for (ue, operation), (requests, first_ns, last_ns, total_ns) in sorted(self.totals.items()):
+            yield {
+                "id": ue,
+                "nf": self.nf,
+                "operation": operation,
+                "requests": requests,
+                "first_timestamp": format_relative(first_ns),
+                "last_timestamp": format_relative(last_ns),
+                "delta_ms": total_ns / 1e6,
+            }
+
+
+def correlate_capture(path, nf):
+    """Read one NF capture and return its TransactionCorrelator after a single pass."""
+    correlator = TransactionCorrelator(nf)
+    for record in read_pcap_http2(path):
+        correlator.add(record)
+    return correlator
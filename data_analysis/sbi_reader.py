@@ -0,0 +1,175 @@
+import re
+import csv
+import json
+
+from pcap_reader import read_pcap_tcp
+from pattern_matcher import PatternMatcher
+
+# Packet sources for the micro (SBI) parsers. Every source yields
+# (frame_number, timestamp, direction, payload) with payload as raw bytes,
+# whether it comes from tshark's JSON export or straight from the capture.
+
+
+def pkttype_direction(pkttype):
+    if pkttype == "0":
+        return "recv"
+    elif pkttype == "4":
+        return "send"
+    return "unknown"
+
+
+READ_SIZE = 1024 * 1024
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(path, read_size=READ_SIZE):
+    """
+    Yield the elements of a top-level JSON array one at a time.
+    Only the current read window and the element being decoded are held in memory,
+    so a multi-GB tshark -T json export is processed in bounded RSS.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+
+    with open(path, "r") as f:
+        while True:
+            # Skip whitespace and the array punctuation between elements
+            while pos < len(buf) and buf[pos] in _WHITESPACE + ("," if started else "["):
+                if buf[pos] == "[":
+                    started = True
+                pos += 1
+
+            if pos < len(buf):
+                if buf[pos] == "]" and started:
+                    return
+                try:
+                    element, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    yield element
+                    pos = end
+                    continue
+            elif eof:
+                if started:
+                    raise ValueError(f"{path}: unterminated JSON array")
+                return
+
+            # Need more data: drop what has been consumed and read the next window
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+
+
+def read_json_tcp(path):
+    """Yield (frame_number, timestamp, direction, payload) from a tshark -T json export, one packet at a time."""
+    for pkt in iter_json_array(path):
+        layers = pkt.get("_source", {}).get("layers", {})
+        payload = layers.get("tcp", {}).get("tcp.payload")
+        if not payload:
+            continue
+
+        frame = layers.get("frame", {})
+        try:
+            payload_bytes = bytes.fromhex(payload.replace(":", ""))
+        except ValueError:
+            continue
+
+        yield (
+            frame.get("frame.number", "N/A"),
+            frame.get("frame.time_relative", "N/A"),
+            pkttype_direction(layers.get("sll", {}).get("sll.pkttype")),
+            payload_bytes,
+        )
+
+
+def read_tcp_payloads(path):
+    """Pick the packet source from the file extension: raw capture or tshark JSON."""
+    if path.endswith((".pcap", ".pcapng")):
+        for frame_number, timestamp, direction, payload in read_pcap_tcp(path):
+            yield str(frame_number), timestamp, direction, payload
+    else:
+        yield from read_json_tcp(path)
+
+
+# === Shared SBI event extraction ===
+EVENT_FIELDS = ["frame_number", "timestamp", "direction", "id", "decoded_payload"]
+
+
+# ASCII bytes str.isprintable() rejects: C0 controls (incl. \t \n \r) and DEL
+_ASCII_NONPRINTABLE = bytes(range(0x20)) + b"\x7f"
+_NON_ASCII = bytes(range(0x80, 0x100))
+# Anything outside printable ASCII; only these runs need a per-character check
+_SUSPECT_RUN = re.compile(r"[^\x20-\x7e]+")
+
+
+def _printable_only(text):
+    return ''.join(c for c in text if c.isprintable())
+
+
+def decode_payload(payload):
+    """
+    Turn a TCP payload (bytes) into the printable text the SBI patterns run on:
+    UTF-8 decoded, invalid sequences and non-printable characters dropped.
+    ASCII payloads are filtered with a byte delete table; mixed ones only check
+    the non-ASCII runs character by character.
+    """
+    if payload.isascii():
+        return payload.translate(None, _ASCII_NONPRINTABLE).decode("ascii")
+
+    decoded_text = payload.decode("utf-8", errors="ignore")
+    if decoded_text.isprintable():
+        return decoded_text
+    # Mostly binary (TLS, compressed bodies): short runs would cost more than a plain scan
+    if 4 * len(payload.translate(None, _NON_ASCII)) < 3 * len(payload):
+        return _printable_only(decoded_text)
+    return _SUSPECT_RUN.sub(lambda m: _printable_only(m.group()), decoded_text)
+
+
+def parse_sbi_events(input_path, patterns, use_imsi_id, extract_ids):
+    """
+    Match every TCP payload against the pattern set and yield one event per hit.
+    The event id is the UE id found by extract_ids, or a per-pattern counter.
+    """
+    matcher = PatternMatcher(patterns)
+    pattern_counters = {i: 1 for i in range(len(patterns))}
+
+    for frame_number, timestamp, direction, payload in read_tcp_payloads(input_path):
+        decoded = decode_payload(payload)
+        pattern_type = matcher.match(decoded)
+
+        if decoded.strip() and pattern_type is not None:
+            if use_imsi_id:
+                imsi = extract_ids(decoded)
+                if imsi:
+                    event_id = imsi
+                else:
+                    event_id = pattern_counters[pattern_type]
+                    pattern_counters[pattern_type] += 1
+            else:
+                event_id = pattern_counters[pattern_type]
+                pattern_counters[pattern_type] += 1
+
+            yield {
+                "frame_number": frame_number,
+                "timestamp": timestamp,
+                "direction": direction,
+                "id": event_id,
+                "decoded_payload": decoded
+            }
+
+
+def write_events_csv(events, output_csv):
+    with open(output_csv, "w", newline='', encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=EVENT_FIELDS)
+        writer.writeheader()
+        count = 0
+        for event in events:
+            writer.writerow(event)
+            count += 1
+    return count
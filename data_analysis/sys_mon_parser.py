@@ -7,6 +7,7 @@ import re
 parser = argparse.ArgumentParser(description="Summarize system monitoring CSVs by operation type and source (ueransim/core).")
 parser.add_argument("--input", "-i", required=True, help="Input root directory to search for *system.csv files.")
 parser.add_argument("--output", "-o", required=True, help="Output directory to store summary CSVs.")
+parser.add_argument("--catalog", help="Catalog (catalog.py) of the input tree, used instead of walking it")
 args = parser.parse_args()
 
 input_root = args.input
@@ -28,36 +29,53 @@ def extract_ue_count(name):
     match = re.match(r'^(\d+)[_-](?:ues|linear)', name.lower())
     return int(match.group(1)) if match else None
 
-for root, _, files in os.walk(input_root):
-    for file in files:
-        if file.endswith("system.csv"):
-            input_path = os.path.join(root, file)
-            folder_name = os.path.basename(root)
-            rel_path = os.path.relpath(input_path, input_root)
+def find_system_csvs():
+    """(input_path, op, core_type, core_name, ue_count) of every *system.csv under input_root."""
+    if args.catalog:
+        from catalog import Catalog
+        catalog = Catalog(args.catalog)
+        entries = catalog.files(kind="system", in_run=False)
+        catalog.close()
+        for entry in entries:
+            root = os.path.dirname(entry["path"])
+            if entry["run_path"] == root:
+                core_type = "ueransim" if entry["source"] == "ueransim" else "core"
+                yield entry["path"], entry["operation"], core_type, entry["run_parent"].lower(), entry["ue_count"]
+            else:
+                yield (entry["path"], *extract_info(os.path.basename(root), os.path.dirname(root)),
+                       extract_ue_count(os.path.basename(root)))
+        return
 
-            parent_path = os.path.dirname(root)
-            op, core_type, core_name = extract_info(folder_name, parent_path)
-            ue_count = extract_ue_count(folder_name)
+    for root, _, files in os.walk(input_root):
+        for file in files:
+            if file.endswith("system.csv"):
+                folder_name = os.path.basename(root)
+                parent_path = os.path.dirname(root)
+                yield (os.path.join(root, file), *extract_info(folder_name, parent_path),
+                       extract_ue_count(folder_name))
 
-            try:
-                df = pd.read_csv(input_path)
+for input_path, op, core_type, core_name, ue_count in find_system_csvs():
+    rel_path = os.path.relpath(input_path, input_root)
 
-                summary = {
-                    "input_file": rel_path,
-                    "ue_count": ue_count,
-                    "operation": op,
-                    "avg_cpu_total": round(df["cpu_total"].mean(), 2),
-                    "max_cpu_total": round(df["cpu_total"].max(), 2),
-                    "avg_mem_used_mb": round(df["mem_used_mb"].mean(), 2),
-                    "max_mem_used_mb": round(df["mem_used_mb"].max(), 2),
-                    "avg_mem_percent": round(df["mem_percent"].mean(), 2),
-                    "max_mem_percent": round(df["mem_percent"].max(), 2)
-                }
+    try:
+        df = pd.read_csv(input_path)
 
-                summaries_by_key[(op, core_type, core_name)].append(summary)
+        summary = {
+            "input_file": rel_path,
+            "ue_count": ue_count,
+            "operation": op,
+            "avg_cpu_total": round(df["cpu_total"].mean(), 2),
+            "max_cpu_total": round(df["cpu_total"].max(), 2),
+            "avg_mem_used_mb": round(df["mem_used_mb"].mean(), 2),
+            "max_mem_used_mb": round(df["mem_used_mb"].max(), 2),
+            "avg_mem_percent": round(df["mem_percent"].mean(), 2),
+            "max_mem_percent": round(df["mem_percent"].max(), 2)
+        }
 
-            except Exception as e:
-                print(f"⚠️ Skipped {input_path}: {e}")
+        summaries_by_key[(op, core_type, core_name)].append(summary)
+
+    except Exception as e:
+        print(f"⚠️ Skipped {input_path}: {e}")
 
 # Write CSVs per (operation, source_type)
 for (op, core_type, core_name), entries in summaries_by_key.items():
@@ -0,0 +1,155 @@
+import os
+import re
+import sys
+import json
+import time
+import threading
+from datetime import datetime
+
+# Client-side per-UE event log for the load generators, one JSON object per line:
+#   {"imsi", "operation", "scheduled", "dispatched", "completed", "result", ...}
+# Times are Unix seconds, the clock capture_with_metrics.py stamps its samples
+# with: the scheduler's monotonic offsets are added to the Unix time taken at
+# the start of the run, so intervals stay monotonic. completed - dispatched is
+# the client-side procedure time to set against the NGAP delta_ms.
+
+EVENT_LOG_DIR = "event_logs"
+
+# nr-ue log lines start with a local wall-clock timestamp, e.g. [2025-05-01 12:00:00.123]
+UE_LOG_TIME = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})\]")
+UE_REGISTERED = "Initial Registration is successful"
+UE_PDU_ESTABLISHED = "PDU Session establishment is successful"
+UE_FAILED = re.compile(r"reject|failed", re.IGNORECASE)
+SUPI = re.compile(r"""^\s*supi:\s*['"]?(imsi-\d+)""", re.MULTILINE)
+
+
+def default_log_path(script, core, count, mode, mean_delay):
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(EVENT_LOG_DIR, f"{script}_{core}_{count}_{mode}_{mean_delay}_{stamp}.ndjson")
+
+
+class EventLog:
+    def __init__(self, path, operation, start_epoch):
+        self.path = path
+        self.operation = operation
+        self.start_epoch = start_epoch
+        self.count = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(path, "w", encoding="utf-8")
+
+    def epoch(self, offset):
+        return None if offset is None else round(self.start_epoch + offset, 6)
+
+    def write(self, imsi, scheduled, dispatched, completed, result, completed_epoch=None, **extra):
+        """scheduled/dispatched/completed are seconds since start; completed_epoch overrides completed."""
+        record = {
+            "imsi": imsi,
+            "operation": self.operation,
+            "scheduled": self.epoch(scheduled),
+            "dispatched": self.epoch(dispatched),
+            "completed": round(completed_epoch, 6) if completed_epoch is not None else self.epoch(completed),
+            "result": result,
+            **extra,
+        }
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+        print(f"📝 {self.count} UE event(s) written to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_command_results(path, operation, results, start_epoch):
+    """Event log of nr_cli_executor results."""
+    with EventLog(path, operation, start_epoch) as log:
+        for r in results:
+            log.write(r["imsi"], r["intended"], r["dispatched"], r["finished"],
+                      "ok" if r["returncode"] == 0 else "error",
+                      started=log.epoch(r["started"]), returncode=r["returncode"])
+
+
+def config_imsi(config_file):
+    with open(config_file, encoding="utf-8") as f:
+        match = SUPI.search(f.read())
+    return match.group(1) if match else None
+
+
+def ue_log_time(line):
+    match = UE_LOG_TIME.match(line)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S.%f").timestamp()
+
+
+class UeLogWatcher:
+    """
+    Tails the nr-ue log files in a background thread and echoes their lines to
+    stdout until each UE logs the success marker or a failure. The completion
+    time is the timestamp nr-ue put on that line (poll time if it has none).
+    nr-ue writes to files rather than pipes so the UEs outlive this script.
+    """
+
+    def __init__(self, success_marker, poll_interval=0.005):
+        self.success_marker = success_marker
+        self.poll_interval = poll_interval
+        self.pending = {}   # imsi -> [file, partial line]
+        self.outcome = {}   # imsi -> (completed epoch, result)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def add(self, imsi, log_path):
+        with self.lock:
+            self.pending[imsi] = [open(log_path, encoding="utf-8", errors="replace"), ""]
+
+    def check(self, imsi, line):
+        if self.success_marker in line:
+            return ue_log_time(line) or time.time(), "ok"
+        if "[nas]" in line and UE_FAILED.search(line):
+            return ue_log_time(line) or time.time(), "error"
+        return None
+
+    def run(self):
+        while not self.stopped.is_set():
+            with self.lock:
+                entries = list(self.pending.items())
+            for imsi, entry in entries:
+                data = entry[0].read()
+                if not data:
+                    continue
+                lines = (entry[1] + data).split("\n")
+                entry[1] = lines.pop()
+                for line in lines:
+                    sys.stdout.write(line + "\n")
+                    outcome = self.check(imsi, line)
+                    if outcome:
+                        with self.lock:
+                            self.outcome[imsi] = outcome
+                            self.pending.pop(imsi)[0].close()
+                        break
+            self.stopped.wait(self.poll_interval)
+
+    def wait(self, timeout):
+        """Wait until every UE has an outcome or timeout seconds pass; returns {imsi: (epoch, result)}."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if not self.pending:
+                    break
+            time.sleep(self.poll_interval)
+        self.stopped.set()
+        self.thread.join()
+        with self.lock:
+            for imsi, entry in self.pending.items():
+                entry[0].close()
+                self.outcome[imsi] = (None, "timeout")
+            self.pending.clear()
+        return dict(self.outcome)
@@ -0,0 +1,96 @@
+import time
+import asyncio
+import numpy as np
+
+from scheduler import dispatch_summary
+
+# Concurrent nr-cli executor. Commands fire at their scheduled offsets on the
+# event loop's monotonic clock as asyncio subprocesses; a semaphore caps how
+# many run at once (commands beyond the cap wait for a free slot and show up as
+# queueing). Every command yields one result dict with its output, exit status
+# and client-side latency.
+
+DEFAULT_CONCURRENCY = 100
+
+
+async def run_command(imsi, argv, intended, dispatched, semaphore, loop, start):
+    async with semaphore:
+        started = loop.time() - start
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await proc.communicate()
+            returncode = proc.returncode
+            stdout, stderr = stdout.decode(errors="replace").strip(), stderr.decode(errors="replace").strip()
+        except OSError as e:
+            returncode, stdout, stderr = None, "", str(e)
+        finished = loop.time() - start
+
+    return {
+        "imsi": imsi,
+        "intended": intended,
+        "dispatched": dispatched,
+        "started": started,
+        "finished": finished,
+        "returncode": returncode,
+        "stdout": stdout,
+        "stderr": stderr,
+        "latency_ms": (finished - started) * 1000,
+    }
+
+
+async def run_scheduled(commands, offsets, concurrency=DEFAULT_CONCURRENCY, on_dispatch=None):
+    """
+    Run [(imsi, argv), ...] with command i fired offsets[i] seconds after start.
+    on_dispatch(imsi, intended, dispatched) is called as each command is fired.
+    Returns (results in command order, (intended, dispatched) records, start as Unix time).
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    start = loop.time()
+    start_epoch = time.time()
+    tasks, records = [], []
+
+    for (imsi, argv), offset in zip(commands, offsets):
+        delay = start + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        dispatched = loop.time() - start
+        records.append((float(offset), dispatched))
+        if on_dispatch:
+            on_dispatch(imsi, float(offset), dispatched)
+        tasks.append(asyncio.create_task(
+            run_command(imsi, argv, float(offset), dispatched, semaphore, loop, start)
+        ))
+
+    results = await asyncio.gather(*tasks)
+    return results, records, start_epoch
+
+
+def execute(commands, offsets, concurrency=DEFAULT_CONCURRENCY, on_dispatch=None):
+    return asyncio.run(run_scheduled(commands, offsets, concurrency, on_dispatch))
+
+
+def format_result(result):
+    if result["returncode"] == 0:
+        return f"✅ {result['imsi']}: {result['stdout']} ({result['latency_ms']:.1f} ms)"
+    return f"❌ {result['imsi']}: {result['stderr'] or result['stdout']} (exit {result['returncode']}, {result['latency_ms']:.1f} ms)"
+
+
+def latency_summary(results):
+    if not results:
+        return "No commands run"
+    latency = np.array([r["latency_ms"] for r in results])
+    queued = np.array([(r["started"] - r["dispatched"]) * 1000 for r in results])
+    failed = sum(r["returncode"] != 0 for r in results)
+    return (f"{len(results) - failed}/{len(results)} succeeded, latency p50 {np.percentile(latency, 50):.1f} ms, "
+            f"p95 {np.percentile(latency, 95):.1f} ms, max {latency.max():.1f} ms, "
+            f"queued max {queued.max():.1f} ms")
+
+
+def report(results, records):
+    for result in results:
+        print(format_result(result))
+    print(f"📈 {dispatch_summary(records)}")
+    print(f"⏱️  {latency_summary(results)}")
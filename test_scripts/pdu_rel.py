@@ -1,8 +1,8 @@
-import subprocess
 import argparse
-import time
-import numpy as np
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from scheduler import send_offsets
+from nr_cli_executor import DEFAULT_CONCURRENCY, execute, report
+from event_log import EVENT_LOG_DIR, default_log_path, write_command_results
 
 
 
@@ -27,6 +27,8 @@ parser.add_argument("--mode", choices=["linear", "exponential"], required=True,
 parser.add_argument("--core", choices=["open5gs", "free5gc", "aether"], required=True, help="Type of delay buffer between UE PDU session starts")
 parser.add_argument("--duration", help="Just to make it compatible with workflow script")
 parser.add_argument("--mean-delay", "-md", type=float, default=mean_delay, help="Average delay between UE starts (seconds)")
+parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum number of nr-cli commands running at once")
+parser.add_argument("--event-log", type=str, help=f"Per-UE NDJSON event log (default: {EVENT_LOG_DIR}/<test>_<core>_<count>_<mode>_<mean delay>_<time>.ndjson)")
 args = parser.parse_args()
 
 # === Determine mode and count ===
@@ -55,33 +57,20 @@ elif core is None:
     exit(1)
 
 
-# === Function to run one command
-def run_nr_cli(imsi, command):
-    full_cmd = ["sudo", nr_cli_path, imsi, "--exec", command]
-    try:
-        result = subprocess.run(full_cmd, check=True, capture_output=True, text=True)
-        return f"✅ {imsi}: {result.stdout.strip()}"
-    except subprocess.CalledProcessError as e:
-        return f"❌ {imsi}: {e.stderr.strip()}"
+# === Command line for one UE
+def nr_cli_command(imsi, command):
+    return ["sudo", nr_cli_path, imsi, "--exec", command]
 
 # === Main Execution ===
-if args.mode == "exponential":
-    rng = np.random.default_rng(seed=69)
-    inter_arrival_times = rng.exponential(scale=mean_delay, size=count - 1)
-elif args.mode == "linear":
-    inter_arrival_times = [mean_delay] * (count - 1)
-
-with ThreadPoolExecutor() as executor:
-    futures = []
-    for i in range(start_index, start_index + count):
-        imsi_number = base_number + (i - start_index)
-        imsi = f"imsi-{imsi_number:015d}"
-        print(f"🔻 Releasing PDU session for {imsi}")
-        futures.append(executor.submit(run_nr_cli, imsi, pdu_release_cmd))
-
-        if i < start_index + count - 1:
-            delay = inter_arrival_times[i - start_index]
-            time.sleep(delay)
-
-    for f in as_completed(futures):
-        print(f.result())
\ No newline at end of file
+imsis = [f"imsi-{base_number + index:015d}" for index in range(count)]
+commands = [(imsi, nr_cli_command(imsi, pdu_release_cmd)) for imsi in imsis]
+
+results, records, start_epoch = execute(
+    commands, send_offsets(count, mean_delay, args.mode), concurrency=args.concurrency,
+    on_dispatch=lambda imsi, intended, actual: print(f"🔻 Releasing PDU session for {imsi} (t={actual:.4f}s, {(actual - intended) * 1000:+.2f} ms)"),
+)
+report(results, records)
+
+operation = "pdu_rel"
+write_command_results(args.event_log or default_log_path(operation, args.core, count, args.mode, mean_delay),
+                      operation, results, start_epoch)
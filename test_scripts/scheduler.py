@@ -0,0 +1,77 @@
+import time
+import numpy as np
+
+# Open-loop arrival scheduling for the load generators.
+# Every UE gets an absolute target send time (the cumulative sum of the sampled
+# inter-arrival times) on the monotonic clock. The loop waits for each target
+# and hands the UE over without waiting for earlier commands to finish, so a
+# slow core cannot stretch the inter-arrival times and lower the offered load.
+
+SEED = 69
+# The last part of each wait is spun instead of slept for sub-millisecond accuracy
+SPIN_SECONDS = 0.0005
+
+
+def inter_arrival_times(count, mean_delay, mode):
+    """The count - 1 gaps between UE starts (same seeded samples as before)."""
+    if mode == "exponential":
+        rng = np.random.default_rng(seed=SEED)
+        return rng.exponential(scale=mean_delay, size=max(count - 1, 0))
+    return np.full(max(count - 1, 0), mean_delay)
+
+
+def send_offsets(count, mean_delay, mode):
+    """Target send time of each UE in seconds after the first one: 0, d1, d1 + d2, ..."""
+    return np.concatenate([[0.0], np.cumsum(inter_arrival_times(count, mean_delay, mode))])[:count]
+
+
+def wait_until(target):
+    remaining = target - time.monotonic()
+    if remaining > SPIN_SECONDS:
+        time.sleep(remaining - SPIN_SECONDS)
+    while time.monotonic() < target:
+        pass
+
+
+class OpenLoopScheduler:
+    """
+    Iterate over (index, intended, actual) with intended/actual dispatch times in
+    seconds since start. Iteration returns as soon as each target time is reached;
+    the caller must dispatch without blocking to keep the schedule.
+    """
+
+    def __init__(self, offsets):
+        self.offsets = np.asarray(offsets, dtype=float)
+        self.start = None
+        self.start_epoch = None
+        self.records = []  # (intended, actual)
+
+    def __iter__(self):
+        self.start = time.monotonic()
+        self.start_epoch = time.time()
+        for index, offset in enumerate(self.offsets):
+            wait_until(self.start + offset)
+            actual = time.monotonic() - self.start
+            self.records.append((float(offset), actual))
+            yield index, float(offset), actual
+
+    def to_epoch(self, offset):
+        """Seconds since start -> Unix time, the clock capture_with_metrics.py logs with."""
+        return self.start_epoch + offset
+
+    def summary(self):
+        return dispatch_summary(self.records)
+
+
+def dispatch_summary(records):
+    """One line on achieved vs target send rate and lateness from (intended, actual) pairs."""
+    if not records:
+        return "No UEs dispatched"
+    intended = np.array([r[0] for r in records])
+    lateness_ms = (np.array([r[1] for r in records]) - intended) * 1000
+    span = records[-1][1] - records[0][1]
+    rate = (len(records) - 1) / span if span > 0 else float("nan")
+    target_span = intended[-1] - intended[0]
+    target_rate = (len(records) - 1) / target_span if target_span > 0 else float("nan")
+    return (f"{len(records)} UEs dispatched at {rate:.1f}/s (target {target_rate:.1f}/s), "
+            f"lateness mean {lateness_ms.mean():.2f} ms, max {lateness_ms.max():.2f} ms")
@@ -1,9 +1,8 @@
-import subprocess
 import argparse
-import time
-import numpy as np
 
-import matplotlib.pyplot as plt
+from scheduler import send_offsets
+from nr_cli_executor import DEFAULT_CONCURRENCY, execute, report
+from event_log import EVENT_LOG_DIR, default_log_path, write_command_results
 
 
 # === CLI Arguments ===
@@ -13,6 +12,8 @@ parser.add_argument("--mode", choices=["linear", "exponential"], required=True,
 parser.add_argument("--core", choices=["open5gs", "free5gc", "aether"], required=True, help="Type of delay buffer between UE PDU session starts")
 parser.add_argument("--duration", help="Just to make it compatible with workflow script")
 parser.add_argument("--mean-delay", "-md", type=float, default=0.01, help="Average delay between UE starts (seconds)")
+parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum number of nr-cli commands running at once")
+parser.add_argument("--event-log", type=str, help=f"Per-UE NDJSON event log (default: {EVENT_LOG_DIR}/<test>_<core>_<count>_<mode>_<mean delay>_<time>.ndjson)")
 args = parser.parse_args()
 
 # === CONFIGURATION ===
@@ -34,21 +35,9 @@ elif args.core == "free5gc":
 elif args.core == "aether":
     base_number = int(aether_imsi_str)
 
-# === Function to run one deregistration
-def run_dereg(imsi):
-    full_cmd = [nr_cli_path, imsi, "--exec", dereg_cmd]
-    try:
-        result = subprocess.run(full_cmd, check=True, capture_output=True, text=True)
-        return f"✅ {imsi}: {result.stdout.strip()}"
-    except subprocess.CalledProcessError as e:
-        return f"❌ {imsi}: {e.stderr.strip()}"
-
-# === Delay Strategy ===
-if args.mode == "exponential":
-    rng = np.random.default_rng(seed=69)
-    delays = rng.exponential(scale=mean_delay, size=args.count - 1)
-else:
-    delays = [mean_delay] * (args.count - 1)
+# === Command line for one deregistration
+def dereg_command(imsi):
+    return [nr_cli_path, imsi, "--exec", dereg_cmd]
 
 # plt.hist(delays, bins=20, density=True, alpha=0.7, color='blue')
 # plt.title(f"Exponential Distribution (mean = {mean_delay})")
@@ -57,12 +46,17 @@ else:
 # plt.grid(True)
 # plt.show()
 
-# === Sequential Execution with Delay ===
-for i in range(start_index, start_index + args.count):
-    imsi_number = base_number + (i - start_index)
-    imsi = f"imsi-{imsi_number:015d}"
-    print(f"🚪 Deregistering UE {imsi}")
-    print(run_dereg(imsi))
+# === Open-Loop Execution ===
+# Deregistrations fire at their target times whether or not earlier ones have returned
+imsis = [f"imsi-{base_number + index:015d}" for index in range(args.count)]
+commands = [(imsi, dereg_command(imsi)) for imsi in imsis]
+
+results, records, start_epoch = execute(
+    commands, send_offsets(args.count, mean_delay, args.mode), concurrency=args.concurrency,
+    on_dispatch=lambda imsi, intended, actual: print(f"🚪 Deregistering UE {imsi} (t={actual:.4f}s, {(actual - intended) * 1000:+.2f} ms)"),
+)
+report(results, records)
 
-    if i < start_index + args.count - 1:
-        time.sleep(delays[i - start_index])
+operation = "ue_dereg"
+write_command_results(args.event_log or default_log_path(operation, args.core, args.count, args.mode, mean_delay),
+                      operation, results, start_epoch)
@@ -1,36 +1,50 @@
 import subprocess
-import time
 import os
 import signal
 import argparse
-import numpy as np
+
+from scheduler import OpenLoopScheduler, send_offsets
+from event_log import EventLog, UeLogWatcher, config_imsi, default_log_path, EVENT_LOG_DIR, UE_PDU_ESTABLISHED
 
 UE_CONFIG_DIR = "/home/ubuntu/UERANSIM/config/tests-ue-with-pdu"
 UE_BINARY = "/home/ubuntu/UERANSIM/build/nr-ue"
 PID_FILE = "ue-pids.txt"
+UE_LOG_DIR = "ue-logs"  # nr-ue output, one file per UE
 
 default_delay = 0.01  # 10 ms
 
-def run_ues(count, mean_delay, duration, mode, core):
-    if mode == "exponential":
-        rng = np.random.default_rng(seed=69)
-        delays = rng.exponential(scale=mean_delay, size=count - 1)
-    elif mode == "linear":
-        delays = [mean_delay] * (count - 1)
+def run_ues(count, mean_delay, duration, mode, core, event_log=None, completion_timeout=60):
+    # Launch times are fixed up front; a slow spawn delays one UE, not all later ones
+    scheduler = OpenLoopScheduler(send_offsets(count, mean_delay, mode))
+    watcher = UeLogWatcher(UE_PDU_ESTABLISHED)
+    launched = []
+    os.makedirs(UE_LOG_DIR, exist_ok=True)
 
     with open(PID_FILE, "w") as pid_file:
-        for i in range(1, count + 1):
+        for index, intended, actual in scheduler:
+            i = index + 1
             config_file = os.path.join(UE_CONFIG_DIR, f"{core}-ue-{i}.yaml")
             if not os.path.exists(config_file):
                 print(f"⚠️ Config file not found: {config_file}")
                 continue
 
-            print(f"🚀 Launching UE {i} with config {config_file}")
-            proc = subprocess.Popen([UE_BINARY, "-c", config_file])
+            print(f"🚀 Launching UE {i} with config {config_file} (t={actual:.4f}s, {(actual - intended) * 1000:+.2f} ms)")
+            imsi = config_imsi(config_file) or f"ue-{i}"
+            log_path = os.path.join(UE_LOG_DIR, f"{core}-ue-{i}.log")
+            with open(log_path, "w") as ue_log:
+                proc = subprocess.Popen([UE_BINARY, "-c", config_file], stdout=ue_log, stderr=subprocess.STDOUT)
             pid_file.write(str(proc.pid) + "\n")
+            watcher.add(imsi, log_path)
+            launched.append((imsi, intended, actual))
+
+    print(f"📈 {scheduler.summary()}")
 
-            if i < count:
-                time.sleep(delays[i - 1])
+    outcome = watcher.wait(completion_timeout)
+    path = event_log or default_log_path("ue_reg_pdu", core, count, mode, mean_delay)
+    with EventLog(path, "ue_reg_pdu", scheduler.start_epoch) as log:
+        for imsi, intended, actual in launched:
+            completed, result = outcome[imsi]
+            log.write(imsi, intended, actual, None, result, completed_epoch=completed)
 
     # print(f"✅ All UEs launched. Keeping UEs running for {duration} seconds...")
     # time.sleep(duration)  # Keep UEs running for the specified duration
@@ -64,9 +78,12 @@ if __name__ == "__main__":
     parser.add_argument("--mode", choices=["linear", "exponential"], required=True, help="Delay mode between UE starts")
     parser.add_argument("--duration", "-d", type=int, default=120, help="Duration to keep UEs running (seconds)")
     parser.add_argument("--kill", "-k", action="store_true", help="Kill UEs started from PID file")
+    parser.add_argument("--event-log", type=str, help=f"Per-UE NDJSON event log (default: {EVENT_LOG_DIR}/<test>_<core>_<count>_<mode>_<mean delay>_<time>.ndjson)")
+    parser.add_argument("--completion-timeout", type=float, default=60, help="Seconds to wait for the last UE to finish before writing the event log")
     args = parser.parse_args()
 
     if args.kill:
         kill_ues()
     elif args.count:
-        run_ues(args.count, args.mean_delay, args.duration, args.mode, args.core)
+        run_ues(args.count, args.mean_delay, args.duration, args.mode, args.core,
+                event_log=args.event_log, completion_timeout=args.completion_timeout)